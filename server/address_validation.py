@@ -0,0 +1,13 @@
+import re
+
+# Base58 alphabet (no 0, O, I or l); Solana public keys encode to 32-44 characters
+SOLANA_ADDRESS_RE = re.compile(r"[1-9A-HJ-NP-Za-km-z]{32,44}")
+ETH_ADDRESS_RE = re.compile(r"0x[0-9a-fA-F]{40}")
+
+
+def is_valid_solana_address(address: str) -> bool:
+    return bool(address) and SOLANA_ADDRESS_RE.fullmatch(address) is not None
+
+
+def is_valid_eth_address(address: str) -> bool:
+    return bool(address) and ETH_ADDRESS_RE.fullmatch(address) is not None
@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Any, Callable, List, Tuple
+
+
+class PooledConnection:
+    """Proxy for a pooled DB-API connection.
+
+    Everything is delegated to the real connection except close(), which
+    hands the connection back to its pool instead of closing it, so existing
+    conn.close() call sites keep working unchanged.
+    """
+
+    def __init__(self, pool: "ConnectionPool", conn: Any):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise AttributeError(f"connection already returned to pool: {name}")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool._release(self._conn)
+            self._conn = None
+
+
+class ConnectionPool:
+    """Keep up to maxsize idle connections open for reuse.
+
+    Connections are opened on demand with connect() and never block
+    waiting for a free one; the pool only caps how many stay open while idle.
+    A connection idle for longer than ping_after seconds is checked with
+    SELECT 1 before it is handed out, since the server may have dropped it.
+    """
+
+    def __init__(self, connect: Callable[[], Any], maxsize: int = 10, ping_after: float = 30.0):
+        self._connect = connect
+        self.maxsize = maxsize
+        self.ping_after = ping_after
+        # (connection, time.monotonic() when it was released)
+        self._idle: List[Tuple[Any, float]] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> PooledConnection:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            # psycopg2 flags connections it found broken with a non-zero .closed
+            if getattr(conn, "closed", 0):
+                continue
+            if time.monotonic() - released_at < self.ping_after or self._is_alive(conn):
+                return PooledConnection(self, conn)
+            self._close_quietly(conn)
+        return PooledConnection(self, self._connect())
+
+    def _release(self, conn: Any):
+        try:
+            # Discard anything the caller left uncommitted
+            conn.rollback()
+        except Exception:
+            self._close_quietly(conn)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append((conn, time.monotonic()))
+                return
+        self._close_quietly(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _is_alive(conn: Any) -> bool:
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: Any):
+        try:
+            conn.close()
+        except Exception:
+            pass
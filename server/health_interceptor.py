@@ -0,0 +1,33 @@
+import json
+
+LIVENESS_PATH = "/healthz"
+
+
+class HealthCheckInterceptor:
+    """ASGI wrapper that answers liveness probes before FastAPI dispatch.
+
+    /health runs database diagnostics through the full middleware stack;
+    LIVENESS_PATH only confirms the process is serving requests, so it is
+    answered here without touching the app or the database.
+    """
+
+    _body = json.dumps({"status": "healthy"}).encode()
+    _headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(_body)).encode()),
+    ]
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == LIVENESS_PATH:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": self._headers,
+            })
+            await send({"type": "http.response.body", "body": self._body})
+            return
+
+        await self.app(scope, receive, send)
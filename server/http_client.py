@@ -0,0 +1,159 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import httpx
+import orjson
+
+try:
+    import h2  # httpx only negotiates HTTP/2 when h2 is installed
+except ImportError:
+    h2 = None
+
+_client: Optional[httpx.AsyncClient] = None
+_in_flight: Dict[Hashable, asyncio.Future] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, creating it on first use.
+
+    Fetchers share this client so connections to Alchemy, CoinGecko and
+    DexScreener stay alive between calls instead of being re-established
+    for every fetch. httpx advertises every Accept-Encoding it can decode
+    (gzip and deflate, plus br when brotli is installed), and HTTP/2 lets
+    concurrent batches share one connection per host.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=h2 is not None,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64))
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client; the next get_http_client() call builds a new one."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# Retry policy for upstream calls: exponential backoff with full jitter
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 4.0
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+async def post_with_retry(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """POST, retrying timeouts and rate-limit/5xx responses up to RETRY_ATTEMPTS times.
+
+    Each wait is drawn uniformly from [0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)]
+    so retries from many wallets don't hit the provider in lockstep. Once
+    attempts run out the last response is returned, or the timeout re-raised.
+    """
+    for attempt in range(RETRY_ATTEMPTS):
+        last_attempt = attempt == RETRY_ATTEMPTS - 1
+        try:
+            response = await client.post(url, **kwargs)
+        except httpx.TimeoutException:
+            if last_attempt:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                return response
+        await asyncio.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)))
+
+
+# Response bodies larger than this are decoded in a worker thread
+JSON_OFFLOAD_THRESHOLD = 64 * 1024
+
+
+async def parse_json(raw: bytes) -> Any:
+    """Decode a JSON response body without stalling the event loop on large payloads.
+
+    Small bodies are parsed inline, where a thread hop would cost more than
+    the parse itself; NFT pages and token lists above JSON_OFFLOAD_THRESHOLD
+    are handed to asyncio.to_thread.
+    """
+    if len(raw) > JSON_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(orjson.loads, raw)
+    return orjson.loads(raw)
+
+
+async def coalesced(key: Hashable, factory: Callable[[], Awaitable]) -> Any:
+    """Run factory() once for all concurrent callers passing the same key.
+
+    A dashboard load can request the same wallet many times at once; the
+    first caller starts the upstream call and the rest await its result.
+    The entry is dropped when the call finishes, so nothing is cached.
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    # shield: one caller being cancelled must not cancel the shared call
+    return await asyncio.shield(task)
+
+
+# Upper bound on calls per JSON-RPC batch request; larger lists are split
+RPC_BATCH_SIZE = 20
+
+# Upper bound on requests a single fetch keeps in flight at once
+MAX_CONCURRENT_REQUESTS = 20
+
+
+async def gather_limited(aws: Iterable[Awaitable],
+                         limit: int = MAX_CONCURRENT_REQUESTS) -> List[Any]:
+    """Await all of aws with at most limit running at once; results keep input order.
+
+    Used instead of a bare asyncio.gather so wallets with hundreds of tokens
+    or NFT collections don't fire hundreds of simultaneous upstream requests.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def guarded(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(guarded(aw) for aw in aws))
+
+
+async def post_rpc_batch(client: httpx.AsyncClient, url: str,
+                         calls: List[Tuple[str, list]]) -> List[Optional[Any]]:
+    """POST (method, params) calls as JSON-RPC batches and return results in call order.
+
+    Chunks of RPC_BATCH_SIZE are sent concurrently, up to MAX_CONCURRENT_REQUESTS
+    at a time, and a chunk identical to one already in flight shares its reply.
+    Calls that errored or are missing from the reply come back as None.
+    """
+    chunks = [calls[i:i + RPC_BATCH_SIZE] for i in range(0, len(calls), RPC_BATCH_SIZE)]
+    replies = await gather_limited(
+        coalesced((url, orjson.dumps(chunk)), lambda chunk=chunk: _post_rpc_chunk(client, url, chunk))
+        for chunk in chunks)
+    return [result for reply in replies for result in reply]
+
+
+async def _post_rpc_chunk(client: httpx.AsyncClient, url: str,
+                          calls: List[Tuple[str, list]]) -> List[Optional[Any]]:
+    payload = [{"id": request_id, "jsonrpc": "2.0", "method": method, "params": params}
+               for request_id, (method, params) in enumerate(calls)]
+    results = [None] * len(calls)
+
+    response = await post_with_retry(client, url, json=payload)
+    if response.status_code != 200:
+        return results
+
+    data = await parse_json(response.content)
+    if not isinstance(data, list):
+        return results
+
+    # Batch replies may arrive in any order; match them back up by id
+    for reply in data:
+        request_id = reply.get("id") if isinstance(reply, dict) else None
+        if isinstance(request_id, int) and 0 <= request_id < len(calls) and "result" in reply:
+            results[request_id] = reply["result"]
+    return results
@@ -1,7 +1,7 @@
 import os
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Protocol
+from typing import List, Dict, Optional, Protocol, Set, Tuple
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -10,11 +10,18 @@ from pydantic import BaseModel
 import httpx
 from web3 import Web3
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import json
 import requests
 from abc import ABC, abstractmethod
+from types import MappingProxyType
 from contextlib import asynccontextmanager
+from address_validation import is_valid_solana_address
+from db_pool import ConnectionPool
+from health_interceptor import HealthCheckInterceptor
+from http_client import (get_http_client, close_http_client, gather_limited, parse_json, post_rpc_batch,
+                         post_with_retry)
+from ttl_cache import price_cache, token_metadata_cache
 
 
 @asynccontextmanager
@@ -66,6 +73,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown (if needed)
     print("🛑 [SHUTDOWN] Application shutting down...")
+    await close_http_client()
+    db_pool.close_all()
 
 
 app = FastAPI(title="Crypto Fund API", version="1.0.0", lifespan=lifespan)
@@ -191,15 +200,27 @@ if not ALCHEMY_API_KEY:
         "ALCHEMY_API_KEY missing - Please add to Replit Secrets")
 
 
+def _connect_db():
+    return psycopg2.connect(DATABASE_URL,
+                            cursor_factory=RealDictCursor,
+                            connect_timeout=10,
+                            application_name="w3e",
+                            # Pooled connections sit idle between requests; keepalives
+                            # stop NATs and the server from silently dropping them
+                            keepalives=1,
+                            keepalives_idle=30,
+                            keepalives_interval=10,
+                            keepalives_count=3)
+
+
+# Connections are reused across requests; conn.close() returns them here
+db_pool = ConnectionPool(_connect_db)
+
+
 def get_db_connection():
-    """Get a PostgreSQL database connection with enhanced error handling"""
+    """Get a pooled PostgreSQL database connection with enhanced error handling"""
     try:
-        # Add connection timeout and retry logic
-        conn = psycopg2.connect(DATABASE_URL,
-                                cursor_factory=RealDictCursor,
-                                connect_timeout=10,
-                                application_name="w3e")
-        return conn
+        return db_pool.get()
     except psycopg2.OperationalError as e:
         error_msg = str(e).lower()
         print(f"❌ [DATABASE ERROR] PostgreSQL connection failed: {e}")
@@ -376,17 +397,48 @@ class AssetFetcher(ABC):
 class PriceFetcher(ABC):
 
     @abstractmethod
-    async def fetch_prices(self,
-                           token_addresses: List[str]) -> Dict[str, float]:
+    async def fetch_prices(
+            self, token_addresses: List[str]) -> Tuple[Dict[str, float], Set[str]]:
+        """Return (price_map, fallback_addresses).
+
+        fallback_addresses holds the lowercased addresses whose price is a
+        placeholder rather than an upstream quote; callers must not cache those.
+        """
         pass
 
 
 # Ethereum-specific implementations
 class EthereumAssetFetcher(AssetFetcher):
 
-    def __init__(self, alchemy_api_key: str):
+    # Known legitimate collections
+    LEGITIMATE_COLLECTIONS = (
+        "mutant ape yacht club", "mayc", "boredapeyachtclub",
+        "bored ape yacht club", "bayc", "cryptopunks", "azuki", "doodles",
+        "pudgypenguins", "0n1 force", "cool cats"
+    )
+
+    # Known legitimate contract addresses (lowercase)
+    LEGITIMATE_CONTRACTS = frozenset({
+        "0x60e4d786628fea6478f785a6d7e704777c86a7c6",  # MAYC
+        "0xbc4ca0eda7647a8ab7c2061c2e118a18a936f13d",  # BAYC
+        "0xb47e3cd837ddf8e4c57f05d70ab865de6e193bbb",  # CryptoPunks
+        "0xed5af388653567af2f388e6224dc7c4b3241c544",  # Azuki
+    })
+
+    # Spam indicators
+    NFT_SPAM_INDICATORS = (
+        "visit ", "claim ", "access ", ".com", ".net", ".org", "award",
+        "gift", "airdrop", "mysterybox", "recipient", "rewards"
+    )
+
+    def __init__(self, alchemy_api_key: str, client: Optional[httpx.AsyncClient] = None):
         self.alchemy_url = f"https://eth-mainnet.g.alchemy.com/v2/{alchemy_api_key}"
         self.w3 = Web3(Web3.HTTPProvider(self.alchemy_url))
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
 
     def _is_legitimate_nft(self, contract_name: str,
                            contract_address: str) -> bool:
@@ -400,35 +452,13 @@ class EthereumAssetFetcher(AssetFetcher):
         contract_name_lower = contract_name.lower()
         contract_address_lower = contract_address.lower()
 
-        # Known legitimate collections
-        legitimate_collections = [
-            "mutant ape yacht club", "mayc", "boredapeyachtclub",
-            "bored ape yacht club", "bayc", "cryptopunks", "azuki", "doodles",
-            "pudgypenguins", "0n1 force", "cool cats"
-        ]
-
-        # Known legitimate contract addresses
-        legitimate_contracts = [
-            "0x60e4d786628fea6478f785a6d7e704777c86a7c6",  # MAYC
-            "0xbc4ca0eda7647a8ab7c2061c2e118a18a936f13d",  # BAYC
-            "0xb47e3cd837ddf8e4c57f05d70ab865de6e193bbb",  # CryptoPunks
-            "0xed5af388653567af2f388e6224dc7c4b3241c544",  # Azuki
-        ]
-
         # Check for legitimate collections
         is_legitimate = (any(legit in contract_name_lower
-                             for legit in legitimate_collections)
-                         or contract_address_lower
-                         in [addr.lower() for addr in legitimate_contracts])
-
-        # Spam indicators
-        spam_indicators = [
-            "visit ", "claim ", "access ", ".com", ".net", ".org", "award",
-            "gift", "airdrop", "mysterybox", "recipient", "rewards"
-        ]
+                             for legit in self.LEGITIMATE_COLLECTIONS)
+                         or contract_address_lower in self.LEGITIMATE_CONTRACTS)
 
         is_spam = any(indicator in contract_name_lower
-                      for indicator in spam_indicators)
+                      for indicator in self.NFT_SPAM_INDICATORS)
 
         # Return True only if legitimate and not spam
         return is_legitimate or (not is_spam and len(contract_name) >= 3)
@@ -450,10 +480,17 @@ class EthereumAssetFetcher(AssetFetcher):
         assets = []
 
         try:
-            # Get ETH balance
             eth_token_address = "0x0000000000000000000000000000000000000000"
+
+            # ETH balance and ERC-20 balances share one JSON-RPC batch round trip
+            calls = [("alchemy_getTokenBalances", [wallet_address])]
             if eth_token_address not in hidden_addresses:
-                eth_balance_wei = self.w3.eth.get_balance(wallet_address)
+                calls.append(("eth_getBalance", [wallet_address, "latest"]))
+            token_result, *eth_result = await post_rpc_batch(self.client, self.alchemy_url, calls)
+
+            # Get ETH balance
+            if eth_result and eth_result[0]:
+                eth_balance_wei = int(eth_result[0], 16)
                 eth_balance_formatted = float(eth_balance_wei) / 10**18
 
                 if eth_balance_formatted > 0:
@@ -467,8 +504,9 @@ class EthereumAssetFetcher(AssetFetcher):
                             decimals=18))
 
             # Get ERC-20 tokens
+            token_balances = (token_result or {}).get("tokenBalances", [])
             assets.extend(await
-                          self._fetch_erc20_tokens(wallet_address,
+                          self._fetch_erc20_tokens(token_balances,
                                                    hidden_addresses))
 
         except Exception as e:
@@ -491,15 +529,13 @@ class EthereumAssetFetcher(AssetFetcher):
                 "pageSize": "100"
             }
 
-            import requests
-
-            response = requests.get(nft_url, params=params, headers={"accept": "application/json"}, timeout=30.0)
+            response = await self.client.get(nft_url, params=params, headers={"accept": "application/json"}, timeout=30.0)
 
             if response.status_code != 200:
                 print(f"❌ [ETH NFT] API failed with status: {response.status_code}")
                 return nfts
 
-            data = response.json()
+            data = await parse_json(response.content)
 
             if "error" in data:
                 print(f"❌ [ETH NFT] API error: {data['error']}")
@@ -515,6 +551,9 @@ class EthereumAssetFetcher(AssetFetcher):
 
             # Group NFTs by collection
             collections = {}
+            hidden_lower = frozenset(addr.lower() for addr in hidden_addresses)
+            # Spam contracts often mint hundreds of NFTs to one wallet; judge each contract once
+            rejected_contracts = set()
 
             for nft in owned_nfts:
                 try:
@@ -528,13 +567,15 @@ class EthereumAssetFetcher(AssetFetcher):
                     if not contract_address:
                         continue
 
-                    if contract_address in [addr.lower() for addr in hidden_addresses]:
-                        continue
-
-                    if not self._is_legitimate_nft(contract_name, contract_address):
+                    if contract_address in rejected_contracts:
                         continue
 
                     if contract_address not in collections:
+                        if (contract_address in hidden_lower
+                                or not self._is_legitimate_nft(contract_name, contract_address)):
+                            rejected_contracts.add(contract_address)
+                            continue
+
                         collections[contract_address] = {
                             "name": contract.get("name", "Unknown Collection"),
                             "symbol": contract.get("symbol", "NFT"),
@@ -572,11 +613,13 @@ class EthereumAssetFetcher(AssetFetcher):
                     print(f"⚠️ [ETH NFT] Error processing NFT: {nft_error}")
                     continue
 
+            # Fetch floor prices concurrently, with a bounded number in flight
+            floor_prices = await gather_limited(
+                self._fetch_floor_price(contract_address) for contract_address in collections)
+
             # Convert collections to NFTData objects
-            for contract_address, collection_data in collections.items():
+            for (contract_address, collection_data), floor_price_usd in zip(collections.items(), floor_prices):
                 try:
-                    floor_price_usd = await self._fetch_floor_price(contract_address)
-
                     nft_asset = NFTData(
                         contract_address=contract_address,
                         symbol=collection_data["symbol"],
@@ -606,13 +649,11 @@ class EthereumAssetFetcher(AssetFetcher):
 
             params = {"contractAddress": contract_address}
 
-            import requests
-
-            response = requests.get(floor_price_url, params=params, headers={"accept": "application/json"}, timeout=15.0)
+            response = await self.client.get(floor_price_url, params=params, headers={"accept": "application/json"}, timeout=15.0)
 
             if response.status_code == 200:
                 try:
-                    data = response.json()
+                    data = await parse_json(response.content)
                     floor_price_usd = 0.0
                     eth_price_usd = 3750.0  # Current approximate ETH price
 
@@ -650,57 +691,55 @@ class EthereumAssetFetcher(AssetFetcher):
             print(f"❌ [FLOOR PRICE] Error fetching floor price: {e}")
             return 0.0
 
-    async def _fetch_erc20_tokens(self, wallet_address: str, hidden_addresses: set) -> List[AssetData]:
+    async def _fetch_erc20_tokens(self, token_balances: List[dict], hidden_addresses: set) -> List[AssetData]:
         assets = []
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.alchemy_url,
-                                             json={
-                                                 "id": 1,
-                                                 "jsonrpc": "2.0",
-                                                 "method": "alchemy_getTokenBalances",
-                                                 "params": [wallet_address]
-                                             })
-
-                if response.status_code == 200:
-                    data = response.json()
-                    token_balances = data.get("result", {}).get("tokenBalances", [])
+            held_tokens = []
+            for token_balance in token_balances:
+                # Parse each hex balance once and reuse it below
+                balance_int = int(token_balance.get("tokenBalance") or "0x0", 16)
+                if balance_int > 0:
+                    contract_address = token_balance["contractAddress"].lower()
+
+                    if contract_address in hidden_addresses:
+                        continue
 
-                    for token_balance in token_balances:
-                        if token_balance.get("tokenBalance") and int(token_balance["tokenBalance"], 16) > 0:
-                            try:
-                                contract_address = token_balance["contractAddress"].lower()
+                    held_tokens.append((contract_address, balance_int))
 
-                                if contract_address in hidden_addresses:
-                                    continue
+            # Get token metadata from the cache, batching one request for the rest
+            metadata_by_address = {
+                contract_address: token_metadata_cache.get(f"meta:eth:{contract_address}")
+                for contract_address, _ in held_tokens
+            }
+            uncached = [address for address, metadata in metadata_by_address.items() if metadata is None]
+            metadata_results = await post_rpc_batch(
+                self.client, self.alchemy_url,
+                [("alchemy_getTokenMetadata", [contract_address]) for contract_address in uncached])
+            for contract_address, metadata in zip(uncached, metadata_results):
+                if metadata is not None:
+                    token_metadata_cache.set(f"meta:eth:{contract_address}", metadata)
+                    metadata_by_address[contract_address] = metadata
+
+            for contract_address, balance_int in held_tokens:
+                metadata = metadata_by_address[contract_address]
+                if metadata is None:
+                    continue
 
-                                # Get token metadata
-                                metadata_response = await client.post(
-                                    self.alchemy_url,
-                                    json={
-                                        "id": 1,
-                                        "jsonrpc": "2.0",
-                                        "method": "alchemy_getTokenMetadata",
-                                        "params": [contract_address]
-                                    })
-
-                                if metadata_response.status_code == 200:
-                                    metadata = metadata_response.json().get("result", {})
-                                    balance_int = int(token_balance["tokenBalance"], 16)
-                                    decimals = metadata.get("decimals", 18)
-                                    balance_formatted = balance_int / (10**decimals)
-
-                                    if balance_formatted > 0.001:  # Filter out dust
-                                        assets.append(AssetData(
-                                            token_address=contract_address,
-                                            symbol=metadata.get("symbol", "UNKNOWN"),
-                                            name=metadata.get("name", "Unknown Token"),
-                                            balance=balance_formatted,
-                                            balance_formatted=f"{balance_formatted:.6f}",
-                                            decimals=decimals))
-                            except Exception as e:
-                                print(f"❌ Error processing Ethereum token {contract_address}: {e}")
+                try:
+                    decimals = metadata.get("decimals", 18)
+                    balance_formatted = balance_int / (10**decimals)
+
+                    if balance_formatted > 0.001:  # Filter out dust
+                        assets.append(AssetData(
+                            token_address=contract_address,
+                            symbol=metadata.get("symbol", "UNKNOWN"),
+                            name=metadata.get("name", "Unknown Token"),
+                            balance=balance_formatted,
+                            balance_formatted=f"{balance_formatted:.6f}",
+                            decimals=decimals))
+                except Exception as e:
+                    print(f"❌ Error processing Ethereum token {contract_address}: {e}")
         except Exception as e:
             print(f"❌ Error fetching Ethereum ERC-20 tokens: {e}")
 
@@ -709,42 +748,49 @@ class EthereumAssetFetcher(AssetFetcher):
 
 class EthereumPriceFetcher(PriceFetcher):
 
-    def __init__(self):
-        self.known_tokens = {
-            "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599": {
-                "symbol": "WBTC",
-                "coingecko_id": "wrapped-bitcoin"
-            },
-            "0x808507121b80c02388fad14726482e061b8da827": {
-                "symbol": "PENDLE",
-                "coingecko_id": "pendle"
-            },
-            "0xa0b73e1ff0b80914ab6fe136c72b47cb5ed05b81": {
-                "symbol": "USDC",
-                "coingecko_id": "usd-coin"
-            },
-            "0xdac17f958d2ee523a2206206994597c13d831ec7": {
-                "symbol": "USDT",
-                "coingecko_id": "tether"
-            },
-            "0x6b175474e89094c44da98b954eedeac495271d0f": {
-                "symbol": "DAI",
-                "coingecko_id": "dai"
-            },
-            "0x1f9840a85d5af5bf1d1762f925bdaddc4201f984": {
-                "symbol": "UNI",
-                "coingecko_id": "uniswap"
-            },
-            # Add some backup mappings for common tokens
-            "0xa0b86a33e6e9e9a7e5b1d1c1d2b6b1b1b1b1b1b1": {
-                "symbol": "USDC",
-                "coingecko_id": "usd-coin"
-            },
-        }
-
-    async def fetch_prices(self,
-                           token_addresses: List[str]) -> Dict[str, float]:
+    known_tokens = MappingProxyType({
+        "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599": {
+            "symbol": "WBTC",
+            "coingecko_id": "wrapped-bitcoin"
+        },
+        "0x808507121b80c02388fad14726482e061b8da827": {
+            "symbol": "PENDLE",
+            "coingecko_id": "pendle"
+        },
+        "0xa0b73e1ff0b80914ab6fe136c72b47cb5ed05b81": {
+            "symbol": "USDC",
+            "coingecko_id": "usd-coin"
+        },
+        "0xdac17f958d2ee523a2206206994597c13d831ec7": {
+            "symbol": "USDT",
+            "coingecko_id": "tether"
+        },
+        "0x6b175474e89094c44da98b954eedeac495271d0f": {
+            "symbol": "DAI",
+            "coingecko_id": "dai"
+        },
+        "0x1f9840a85d5af5bf1d1762f925bdaddc4201f984": {
+            "symbol": "UNI",
+            "coingecko_id": "uniswap"
+        },
+        # Add some backup mappings for common tokens
+        "0xa0b86a33e6e9e9a7e5b1d1c1d2b6b1b1b1b1b1b1": {
+            "symbol": "USDC",
+            "coingecko_id": "usd-coin"
+        },
+    })
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
+
+    async def fetch_prices(
+            self, token_addresses: List[str]) -> Tuple[Dict[str, float], Set[str]]:
         price_map = {}
+        fallback_addresses = set()
         # ETH uses a special zero address - this is the standard way to represent native ETH
         eth_address = "0x0000000000000000000000000000000000000000"
         eth_address_lower = eth_address.lower()
@@ -754,120 +800,121 @@ class EthereumPriceFetcher(PriceFetcher):
         print(f"🔍 ETH special address: {eth_address}")
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # CRITICAL: Get ETH price first - ETH is special case with zero address
-                print(f"📡 Fetching ETH price from CoinGecko...")
+            client = self.client
+            # CRITICAL: Get ETH price first - ETH is special case with zero address
+            print(f"📡 Fetching ETH price from CoinGecko...")
+            response = await client.get(
+                "https://api.coingecko.com/api/v3/simple/price",
+                params={
+                    "ids": "ethereum",
+                    "vs_currencies": "usd"
+                })
+            if response.status_code == 200:
+                data = await parse_json(response.content)
+                eth_price = data.get("ethereum", {}).get("usd", 0)
+                # Store ETH price with multiple address formats for lookup
+                price_map[eth_address] = eth_price
+                price_map[eth_address_lower] = eth_price
+                price_map["eth"] = eth_price  # Additional fallback
+                print(f"✅ ETH price fetched successfully: ${eth_price}")
+                print(
+                    f"✅ ETH price stored for addresses: {eth_address}, {eth_address_lower}"
+                )
+            else:
+                print(
+                    f"❌ Failed to fetch ETH price: HTTP {response.status_code}"
+                )
+                # Set fallback ETH price if API fails
+                fallback_eth_price = 3500.0  # Reasonable fallback
+                price_map[eth_address] = fallback_eth_price
+                price_map[eth_address_lower] = fallback_eth_price
+                fallback_addresses.add(eth_address_lower)
+                print(f"🔄 Using fallback ETH price: ${fallback_eth_price}")
+
+            # Process contract addresses
+            contract_addresses = [
+                addr for addr in token_addresses if addr != eth_address
+            ]
+            known_ids = []
+            address_to_id = {}
+
+            for addr in contract_addresses:
+                addr_lower = addr.lower()
+                if addr_lower in self.known_tokens:
+                    coingecko_id = self.known_tokens[addr_lower][
+                        "coingecko_id"]
+                    known_ids.append(coingecko_id)
+                    address_to_id[coingecko_id] = addr_lower
+                    print(
+                        f"✅ Found known Ethereum token: {self.known_tokens[addr_lower]['symbol']} -> {coingecko_id}"
+                    )
+
+            # Fetch known token prices
+            if known_ids:
                 response = await client.get(
                     "https://api.coingecko.com/api/v3/simple/price",
                     params={
-                        "ids": "ethereum",
+                        "ids": ",".join(known_ids),
                         "vs_currencies": "usd"
                     })
                 if response.status_code == 200:
-                    data = response.json()
-                    eth_price = data.get("ethereum", {}).get("usd", 0)
-                    # Store ETH price with multiple address formats for lookup
-                    price_map[eth_address] = eth_price
-                    price_map[eth_address_lower] = eth_price
-                    price_map["eth"] = eth_price  # Additional fallback
-                    print(f"✅ ETH price fetched successfully: ${eth_price}")
-                    print(
-                        f"✅ ETH price stored for addresses: {eth_address}, {eth_address_lower}"
-                    )
-                else:
+                    data = await parse_json(response.content)
+                    for coingecko_id, price_data in data.items():
+                        if isinstance(price_data,
+                                      dict) and "usd" in price_data:
+                            addr = address_to_id.get(coingecko_id)
+                            if addr:
+                                price_map[addr] = price_data["usd"]
+                                original_addr = next(
+                                    (a for a in contract_addresses
+                                     if a.lower() == addr), addr)
+                                price_map[original_addr] = price_data[
+                                    "usd"]
+                                print(
+                                    f"✅ Got Ethereum price: {addr} = ${price_data['usd']}"
+                                )
+
+            # Try CoinGecko contract API for remaining tokens
+            remaining_addresses = [
+                addr for addr in contract_addresses
+                if addr.lower() not in price_map and addr not in price_map
+            ]
+            if remaining_addresses:
+                print(
+                    f"📡 Trying CoinGecko contract API for {len(remaining_addresses)} remaining tokens..."
+                )
+                try:
+                    response = await client.get(
+                        "https://api.coingecko.com/api/v3/simple/token_price/ethereum",
+                        params={
+                            "contract_addresses":
+                            ",".join(remaining_addresses[:30]),
+                            "vs_currencies":
+                            "usd"
+                        },
+                        timeout=15.0)
                     print(
-                        f"❌ Failed to fetch ETH price: HTTP {response.status_code}"
+                        f"📊 CoinGecko contract API response: {response.status_code}"
                     )
-                    # Set fallback ETH price if API fails
-                    fallback_eth_price = 3500.0  # Reasonable fallback
-                    price_map[eth_address] = fallback_eth_price
-                    price_map[eth_address_lower] = fallback_eth_price
-                    print(f"🔄 Using fallback ETH price: ${fallback_eth_price}")
-
-                # Process contract addresses
-                contract_addresses = [
-                    addr for addr in token_addresses if addr != eth_address
-                ]
-                known_ids = []
-                address_to_id = {}
-
-                for addr in contract_addresses:
-                    addr_lower = addr.lower()
-                    if addr_lower in self.known_tokens:
-                        coingecko_id = self.known_tokens[addr_lower][
-                            "coingecko_id"]
-                        known_ids.append(coingecko_id)
-                        address_to_id[coingecko_id] = addr_lower
+                    if response.status_code == 200:
+                        data = await parse_json(response.content)
                         print(
-                            f"✅ Found known Ethereum token: {self.known_tokens[addr_lower]['symbol']} -> {coingecko_id}"
+                            f"📈 Contract API returned data for {len(data)} tokens"
                         )
-
-                # Fetch known token prices
-                if known_ids:
-                    response = await client.get(
-                        "https://api.coingecko.com/api/v3/simple/price",
-                        params={
-                            "ids": ",".join(known_ids),
-                            "vs_currencies": "usd"
-                        })
-                    if response.status_code == 200:
-                        data = response.json()
-                        for coingecko_id, price_data in data.items():
+                        for addr, price_data in data.items():
                             if isinstance(price_data,
                                           dict) and "usd" in price_data:
-                                addr = address_to_id.get(coingecko_id)
-                                if addr:
-                                    price_map[addr] = price_data["usd"]
-                                    original_addr = next(
-                                        (a for a in contract_addresses
-                                         if a.lower() == addr), addr)
-                                    price_map[original_addr] = price_data[
-                                        "usd"]
-                                    print(
-                                        f"✅ Got Ethereum price: {addr} = ${price_data['usd']}"
-                                    )
-
-                # Try CoinGecko contract API for remaining tokens
-                remaining_addresses = [
-                    addr for addr in contract_addresses
-                    if addr.lower() not in price_map and addr not in price_map
-                ]
-                if remaining_addresses:
-                    print(
-                        f"📡 Trying CoinGecko contract API for {len(remaining_addresses)} remaining tokens..."
-                    )
-                    try:
-                        response = await client.get(
-                            "https://api.coingecko.com/api/v3/simple/token_price/ethereum",
-                            params={
-                                "contract_addresses":
-                                ",".join(remaining_addresses[:30]),
-                                "vs_currencies":
-                                "usd"
-                            },
-                            timeout=15.0)
+                                price_map[addr.lower()] = price_data["usd"]
+                                price_map[addr] = price_data["usd"]
+                                print(
+                                    f"✅ Got Ethereum contract API price: {addr} = ${price_data['usd']}"
+                                )
+                    else:
                         print(
-                            f"📊 CoinGecko contract API response: {response.status_code}"
+                            f"❌ CoinGecko contract API error: {response.status_code}"
                         )
-                        if response.status_code == 200:
-                            data = response.json()
-                            print(
-                                f"📈 Contract API returned data for {len(data)} tokens"
-                            )
-                            for addr, price_data in data.items():
-                                if isinstance(price_data,
-                                              dict) and "usd" in price_data:
-                                    price_map[addr.lower()] = price_data["usd"]
-                                    price_map[addr] = price_data["usd"]
-                                    print(
-                                        f"✅ Got Ethereum contract API price: {addr} = ${price_data['usd']}"
-                                    )
-                        else:
-                            print(
-                                f"❌ CoinGecko contract API error: {response.status_code}"
-                            )
-                    except Exception as e:
-                        print(f"❌ CoinGecko contract API exception: {e}")
+                except Exception as e:
+                    print(f"❌ CoinGecko contract API exception: {e}")
 
         except Exception as e:
             print(f"❌ Error fetching Ethereum prices: {e}")
@@ -884,64 +931,72 @@ class EthereumPriceFetcher(PriceFetcher):
                 print(f"🔄 Using fallback price for {addr}: ${fallback_price}")
                 price_map[addr.lower()] = fallback_price
                 price_map[addr] = fallback_price
+                fallback_addresses.add(addr.lower())
 
-        return price_map
+        return price_map, fallback_addresses
 
 
 # Solana-specific implementations
 class SolanaAssetFetcher(AssetFetcher):
 
-    def __init__(self, alchemy_api_key: str):
+    known_tokens = MappingProxyType({
+        "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {
+            "symbol": "USDC",
+            "name": "USD Coin"
+        },
+        "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {
+            "symbol": "USDT",
+            "name": "Tether USD"
+        },
+        "So11111111111111111111111111111111111111112": {
+            "symbol": "WSOL",
+            "name": "Wrapped SOL"
+        },
+        "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": {
+            "symbol": "BONK",
+            "name": "Bonk"
+        },
+        "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": {
+            "symbol": "ETH",
+            "name": "Ether (Portal)"
+        },
+        "mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So": {
+            "symbol": "mSOL",
+            "name": "Marinade Staked SOL"
+        },
+    })
+
+    def __init__(self, alchemy_api_key: str, client: Optional[httpx.AsyncClient] = None):
         self.solana_url = f"https://solana-mainnet.g.alchemy.com/v2/{alchemy_api_key}"
-        self.known_tokens = {
-            "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {
-                "symbol": "USDC",
-                "name": "USD Coin"
-            },
-            "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {
-                "symbol": "USDT",
-                "name": "Tether USD"
-            },
-            "So11111111111111111111111111111111111111112": {
-                "symbol": "WSOL",
-                "name": "Wrapped SOL"
-            },
-            "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": {
-                "symbol": "BONK",
-                "name": "Bonk"
-            },
-            "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": {
-                "symbol": "ETH",
-                "name": "Ether (Portal)"
-            },
-            "mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So": {
-                "symbol": "mSOL",
-                "name": "Marinade Staked SOL"
-            },
-        }
+        self._client = client
         self.spl_token_program = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
         self.spl_token_2022_program = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
+
     async def fetch_assets(self, wallet_address: str,
                            hidden_addresses: set) -> List[AssetData]:
         assets = []
 
-        if not self._is_valid_solana_address(wallet_address):
+        if not is_valid_solana_address(wallet_address):
             return assets
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Get SOL balance
-                if "solana" not in hidden_addresses:
-                    sol_asset = await self._fetch_sol_balance(
-                        client, wallet_address)
-                    if sol_asset:
-                        assets.append(sol_asset)
-
-                # Get SPL tokens
-                spl_assets = await self._fetch_spl_tokens(
-                    client, wallet_address, hidden_addresses)
-                assets.extend(spl_assets)
+            client = self.client
+
+            # Get SOL balance
+            if "solana" not in hidden_addresses:
+                sol_asset = await self._fetch_sol_balance(
+                    client, wallet_address)
+                if sol_asset:
+                    assets.append(sol_asset)
+
+            # Get SPL tokens
+            spl_assets = await self._fetch_spl_tokens(
+                client, wallet_address, hidden_addresses)
+            assets.extend(spl_assets)
 
         except Exception as e:
             print(f"❌ Error fetching Solana assets: {e}")
@@ -953,20 +1008,6 @@ class SolanaAssetFetcher(AssetFetcher):
         # For now, return empty list
         return []
 
-    def _is_valid_solana_address(self, address: str) -> bool:
-        try:
-            import base58
-            if not address or len(address) < 32 or len(address) > 44:
-                return False
-            decoded = base58.b58decode(address)
-            return len(decoded) == 32
-        except:
-            import re
-            if not address or len(address) < 32 or len(address) > 44:
-                return False
-            base58_pattern = r'^[1-9A-HJ-NP-Za-km-z]+$'
-            return bool(re.match(base58_pattern, address))
-
     async def _fetch_sol_balance(self, client: httpx.AsyncClient,
                                  wallet_address: str) -> Optional[AssetData]:
         try:
@@ -979,10 +1020,10 @@ class SolanaAssetFetcher(AssetFetcher):
                 }]
             }
 
-            response = await client.post(self.solana_url, json=rpc_payload, timeout=30.0)
+            response = await post_with_retry(client, self.solana_url, json=rpc_payload, timeout=30.0)
 
             if response.status_code == 200:
-                data = response.json()
+                data = await parse_json(response.content)
                 if "error" in data:
                     return None
 
@@ -1013,6 +1054,7 @@ class SolanaAssetFetcher(AssetFetcher):
                                 wallet_address: str,
                                 hidden_addresses: set) -> List[AssetData]:
         assets = []
+        held_tokens = []
         program_ids = [self.spl_token_program, self.spl_token_2022_program]
 
         for program_id in program_ids:
@@ -1028,10 +1070,10 @@ class SolanaAssetFetcher(AssetFetcher):
                     ]
                 }
 
-                response = await client.post(self.solana_url, json=rpc_payload, timeout=30.0)
+                response = await post_with_retry(client, self.solana_url, json=rpc_payload, timeout=30.0)
 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = await parse_json(response.content)
                     if "error" in data:
                         continue
 
@@ -1078,36 +1120,48 @@ class SolanaAssetFetcher(AssetFetcher):
                                     balance = 0
 
                                 if balance > 0:
-                                    if mint_address in self.known_tokens:
-                                        symbol = self.known_tokens[mint_address]["symbol"]
-                                        name = self.known_tokens[mint_address]["name"]
-                                    else:
-                                        symbol, name = await self._fetch_token_metadata(client, mint_address)
-
-                                    asset = AssetData(
-                                        token_address=mint_address,
-                                        symbol=symbol,
-                                        name=name,
-                                        balance=balance,
-                                        balance_formatted=f"{balance:.6f}",
-                                        decimals=decimals)
-                                    assets.append(asset)
+                                    held_tokens.append((mint_address, balance, decimals))
 
                             except Exception:
                                 continue
 
             except Exception:
                 continue
+
+        # Look up unknown mints concurrently, with a bounded number in flight
+        unknown_mints = list(dict.fromkeys(mint for mint, _, _ in held_tokens if mint not in self.known_tokens))
+        fetched_metadata = dict(zip(unknown_mints, await gather_limited(
+            self._fetch_token_metadata(client, mint) for mint in unknown_mints)))
+
+        for mint_address, balance, decimals in held_tokens:
+            if mint_address in self.known_tokens:
+                symbol = self.known_tokens[mint_address]["symbol"]
+                name = self.known_tokens[mint_address]["name"]
+            else:
+                symbol, name = fetched_metadata[mint_address]
+
+            asset = AssetData(
+                token_address=mint_address,
+                symbol=symbol,
+                name=name,
+                balance=balance,
+                balance_formatted=f"{balance:.6f}",
+                decimals=decimals)
+            assets.append(asset)
         return assets
 
     async def _fetch_token_metadata(self, client: httpx.AsyncClient,
                                     mint_address: str) -> tuple[str, str]:
+        cached = token_metadata_cache.get(f"meta:sol:{mint_address}")
+        if cached is not None:
+            return cached
+
         try:
             # Try DexScreener API
             dex_url = f"https://api.dexscreener.com/latest/dex/tokens/{mint_address}"
             dex_response = await client.get(dex_url, timeout=15.0)
             if dex_response.status_code == 200:
-                dex_data = dex_response.json()
+                dex_data = await parse_json(dex_response.content)
                 if 'pairs' in dex_data and len(dex_data['pairs']) > 0:
                     for pair in dex_data['pairs']:
                         base_token = pair.get('baseToken', {})
@@ -1115,6 +1169,7 @@ class SolanaAssetFetcher(AssetFetcher):
                             symbol = base_token.get('symbol', '')
                             name = base_token.get('name', '')
                             if symbol and name and symbol != 'unknown':
+                                token_metadata_cache.set(f"meta:sol:{mint_address}", (symbol, name))
                                 return symbol, name
         except Exception:
             pass
@@ -1126,74 +1181,82 @@ class SolanaAssetFetcher(AssetFetcher):
 
 class SolanaPriceFetcher(PriceFetcher):
 
-    def __init__(self):
-        self.known_tokens = {
-            "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {
-                "symbol": "USDC",
-                "coingecko_id": "usd-coin"
-            },
-            "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {
-                "symbol": "USDT",
-                "coingecko_id": "tether"
-            },
-            "So11111111111111111111111111111111111111112": {
-                "symbol": "WSOL",
-                "coingecko_id": "wrapped-solana"
-            },
-            "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": {
-                "symbol": "BONK",
-                "coingecko_id": "bonk"
-            },
-            "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": {
-                "symbol": "ETH",
-                "coingecko_id": "ethereum"
-            },
-            "mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So": {
-                "symbol": "mSOL",
-                "coingecko_id": "marinade-staked-sol"
-            },
-        }
-
-    async def fetch_prices(self,
-                           token_addresses: List[str]) -> Dict[str, float]:
+    known_tokens = MappingProxyType({
+        "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {
+            "symbol": "USDC",
+            "coingecko_id": "usd-coin"
+        },
+        "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {
+            "symbol": "USDT",
+            "coingecko_id": "tether"
+        },
+        "So11111111111111111111111111111111111111112": {
+            "symbol": "WSOL",
+            "coingecko_id": "wrapped-solana"
+        },
+        "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": {
+            "symbol": "BONK",
+            "coingecko_id": "bonk"
+        },
+        "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": {
+            "symbol": "ETH",
+            "coingecko_id": "ethereum"
+        },
+        "mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So": {
+            "symbol": "mSOL",
+            "coingecko_id": "marinade-staked-sol"
+        },
+    })
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
+
+    async def fetch_prices(
+            self, token_addresses: List[str]) -> Tuple[Dict[str, float], Set[str]]:
         price_map = {}
+        fallback_addresses = set()
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # Get SOL price first
-                try:
-                    response = await client.get(
-                        "https://api.coingecko.com/api/v3/simple/price",
-                        params={"ids": "solana", "vs_currencies": "usd"},
-                        timeout=15.0)
-                    if response.status_code == 200:
-                        data = response.json()
-                        sol_price = data.get("solana", {}).get("usd", 0)
-                        price_map["solana"] = sol_price
-                except Exception:
-                    pass
+            client = self.client
+            # Get SOL price first
+            try:
+                response = await client.get(
+                    "https://api.coingecko.com/api/v3/simple/price",
+                    params={"ids": "solana", "vs_currencies": "usd"},
+                    timeout=15.0)
+                if response.status_code == 200:
+                    data = await parse_json(response.content)
+                    sol_price = data.get("solana", {}).get("usd", 0)
+                    price_map["solana"] = sol_price
+            except Exception:
+                pass
 
-                # Process mint addresses
-                mint_addresses = [
-                    addr for addr in token_addresses if addr != "solana"
-                ]
+            # Process mint addresses
+            mint_addresses = [
+                addr for addr in token_addresses if addr != "solana"
+            ]
 
-                # Method 1: Known tokens
-                await self._fetch_known_token_prices(client, mint_addresses, price_map)
+            # Method 1: Known tokens
+            await self._fetch_known_token_prices(client, mint_addresses, price_map)
 
-                # Method 2: DexScreener API
-                await self._fetch_dexscreener_prices(client, mint_addresses, price_map)
+            # Method 2: DexScreener API
+            await self._fetch_dexscreener_prices(client, mint_addresses, price_map)
 
-                # Final fallback
-                for addr in mint_addresses:
-                    if addr.lower() not in price_map and addr not in price_map:
-                        price_map[addr.lower()] = 0
-                        price_map[addr] = 0
+            # Final fallback
+            for addr in mint_addresses:
+                if addr.lower() not in price_map and addr not in price_map:
+                    price_map[addr.lower()] = 0
+                    price_map[addr] = 0
+                    fallback_addresses.add(addr.lower())
 
         except Exception:
             pass
 
-        return price_map
+        return price_map, fallback_addresses
 
     async def _fetch_known_token_prices(self, client: httpx.AsyncClient, mint_addresses: List[str], price_map: Dict[str, float]):
         known_ids = []
@@ -1210,9 +1273,10 @@ class SolanaPriceFetcher(PriceFetcher):
             try:
                 response = await client.get(
                     "https://api.coingecko.com/api/v3/simple/price",
-                    params={"ids": ",".join(known_ids), "vs_currencies": "usd"})
+                    params={"ids": ",".join(known_ids), "vs_currencies": "usd"},
+                    timeout=60.0)
                 if response.status_code == 200:
-                    data = response.json()
+                    data = await parse_json(response.content)
                     for coingecko_id, price_data in data.items():
                         if isinstance(price_data, dict) and "usd" in price_data:
                             addr = address_to_id.get(coingecko_id)
@@ -1239,7 +1303,7 @@ class SolanaPriceFetcher(PriceFetcher):
                     timeout=15.0)
 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = await parse_json(response.content)
                     if "pairs" in data and data["pairs"]:
                         for pair in data["pairs"]:
                             if pair and "baseToken" in pair and "priceUsd" in pair:
@@ -1527,22 +1591,49 @@ async def get_wallet_assets_new(wallet_address: str, network: str) -> tuple[List
         return [], []
 
 
+async def get_network_prices(network: str, token_addresses: List[str]) -> Dict[str, float]:
+    """Fetch prices for one network, serving recently fetched prices from the cache"""
+    prices = {}
+    missing = []
+    for addr in token_addresses:
+        price = price_cache.get(f"price:{network}:{addr.lower()}")
+        if price is None:
+            missing.append(addr)
+        else:
+            prices[addr] = prices[addr.lower()] = price
+
+    if missing:
+        price_fetcher = ChainFactory.create_price_fetcher(network)
+        network_prices, fallback_addresses = await price_fetcher.fetch_prices(missing)
+        prices.update(network_prices)
+        for addr in missing:
+            # Placeholder prices are served this once but refetched next time
+            if addr.lower() in fallback_addresses:
+                continue
+            price = network_prices.get(addr.lower()) or network_prices.get(addr)
+            if price:
+                price_cache.set(f"price:{network}:{addr.lower()}", price)
+        print(f"✅ Fetched {len(network_prices)} prices for {network}")
+    print(f"💾 Price cache for {network}: {len(token_addresses) - len(missing)} hits, "
+          f"{len(missing)} misses")
+    return prices
+
+
 async def get_token_prices_new(token_addresses_by_network: Dict[str, List[str]]) -> Dict[str, float]:
     """Fetch prices for tokens across networks"""
     all_prices = {}
+    networks = [network for network, token_addresses in token_addresses_by_network.items() if token_addresses]
 
-    for network, token_addresses in token_addresses_by_network.items():
-        if not token_addresses:
-            continue
-
-        try:
-            price_fetcher = ChainFactory.create_price_fetcher(network)
-            network_prices = await price_fetcher.fetch_prices(token_addresses)
-            all_prices.update(network_prices)
-            print(f"✅ Fetched {len(network_prices)} prices for {network}")
+    # Networks are priced concurrently; one provider failing doesn't drop the others
+    results = await asyncio.gather(
+        *(get_network_prices(network, token_addresses_by_network[network]) for network in networks),
+        return_exceptions=True)
 
-        except Exception as e:
-            print(f"❌ Error fetching prices for {network}: {e}")
+    for network, result in zip(networks, results):
+        if isinstance(result, Exception):
+            print(f"❌ Error fetching prices for {network}: {result}")
+            continue
+        all_prices.update(result)
 
     return all_prices
 
@@ -1682,6 +1773,12 @@ async def update_portfolio_data_new():
         # Insert assets with prices
         total_portfolio_value = 0
         auto_hide_candidates = []
+        asset_rows = []
+        nft_rows = []
+
+        # Load all purchase price overrides once instead of querying per asset
+        cursor.execute("SELECT token_address, override_price FROM purchase_price_overrides")
+        purchase_price_overrides = {row['token_address']: row['override_price'] for row in cursor.fetchall()}
 
         # Process regular assets
         for asset_item in all_assets:
@@ -1701,13 +1798,10 @@ async def update_portfolio_data_new():
             value_usd = asset.balance * price_usd
 
             # Check for purchase price override
-            cursor.execute(
-                "SELECT override_price FROM purchase_price_overrides WHERE token_address = %s",
-                (asset.token_address,))
-            override_data = cursor.fetchone()
+            override_price = purchase_price_overrides.get(asset.token_address)
 
-            if override_data:
-                purchase_price = override_data['override_price']
+            if override_price is not None:
+                purchase_price = override_price
                 total_invested = asset.balance * purchase_price
                 realized_pnl = 0
                 unrealized_pnl = value_usd - total_invested if total_invested > 0 else 0
@@ -1736,26 +1830,24 @@ async def update_portfolio_data_new():
                     'reason': reason
                 })
 
-            # Insert asset
-            try:
-                cursor.execute(
-                    """
-                    INSERT INTO assets 
-                    (wallet_id, token_address, symbol, name, balance, balance_formatted, price_usd, value_usd,
-                     purchase_price, total_invested, realized_pnl, unrealized_pnl, total_return_pct, price_change_24h)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (wallet_id, asset.token_address, asset.symbol, asset.name, asset.balance,
-                      asset.balance_formatted, price_usd, value_usd, purchase_price, total_invested,
-                      realized_pnl, unrealized_pnl, total_return_pct, 0))
-
-                wallet_status[wallet_id]['total_value'] += value_usd
-                total_portfolio_value += value_usd
-
-                print(f"💰 {network} Asset: {asset.symbol} = ${value_usd:.2f}")
-
-            except Exception as db_error:
-                print(f"❌ [DATABASE ERROR] Failed to insert {asset.symbol}: {db_error}")
-                continue
+            asset_rows.append((wallet_id, asset.token_address, asset.symbol, asset.name, asset.balance,
+                               asset.balance_formatted, price_usd, value_usd, purchase_price, total_invested,
+                               realized_pnl, unrealized_pnl, total_return_pct, 0))
+
+            wallet_status[wallet_id]['total_value'] += value_usd
+            total_portfolio_value += value_usd
+
+            print(f"💰 {network} Asset: {asset.symbol} = ${value_usd:.2f}")
+
+        # Insert all assets in one statement instead of one round trip per row
+        if asset_rows:
+            execute_values(cursor,
+                """
+                INSERT INTO assets 
+                (wallet_id, token_address, symbol, name, balance, balance_formatted, price_usd, value_usd,
+                 purchase_price, total_invested, realized_pnl, unrealized_pnl, total_return_pct, price_change_24h)
+                VALUES %s
+            """, asset_rows)
 
         # Process NFTs
         for nft_item in all_nfts:
@@ -1771,27 +1863,24 @@ async def update_portfolio_data_new():
             unrealized_pnl = total_value_usd - total_invested if total_invested > 0 else 0
             total_return_pct = ((total_value_usd - total_invested) / total_invested * 100) if total_invested > 0 else 0
 
-            # Insert NFT collection
-            try:
-                cursor.execute(
-                    """
-                    INSERT INTO nft_collections 
-                    (wallet_id, contract_address, symbol, name, item_count, token_ids, floor_price_usd, 
-                     total_value_usd, image_url, purchase_price, total_invested, realized_pnl, 
-                     unrealized_pnl, total_return_pct)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (wallet_id, nft.contract_address, nft.symbol, nft.name, nft.item_count,
-                      json.dumps(nft.token_ids), nft.floor_price_usd, total_value_usd, nft.image_url,
-                      purchase_price, total_invested, 0, unrealized_pnl, total_return_pct))
-
-                wallet_status[wallet_id]['total_value'] += total_value_usd
-                total_portfolio_value += total_value_usd
-
-                print(f"🖼️ {network} NFT: {nft.name} ({nft.item_count} items) = ${total_value_usd:.2f}")
-
-            except Exception as db_error:
-                print(f"❌ [DATABASE ERROR] Failed to insert NFT {nft.name}: {db_error}")
-                continue
+            nft_rows.append((wallet_id, nft.contract_address, nft.symbol, nft.name, nft.item_count,
+                             json.dumps(nft.token_ids), nft.floor_price_usd, total_value_usd, nft.image_url,
+                             purchase_price, total_invested, 0, unrealized_pnl, total_return_pct))
+
+            wallet_status[wallet_id]['total_value'] += total_value_usd
+            total_portfolio_value += total_value_usd
+
+            print(f"🖼️ {network} NFT: {nft.name} ({nft.item_count} items) = ${total_value_usd:.2f}")
+
+        if nft_rows:
+            execute_values(cursor,
+                """
+                INSERT INTO nft_collections 
+                (wallet_id, contract_address, symbol, name, item_count, token_ids, floor_price_usd, 
+                 total_value_usd, image_url, purchase_price, total_invested, realized_pnl, 
+                 unrealized_pnl, total_return_pct)
+                VALUES %s
+            """, nft_rows)
 
         # Auto-hide spam/low value tokens
         if auto_hide_candidates:
@@ -1820,13 +1909,14 @@ async def update_portfolio_data_new():
 
         # Update wallet status
         cursor.execute("DELETE FROM wallet_status")
-        for wallet_id, status_info in wallet_status.items():
-            cursor.execute(
+        if wallet_status:
+            execute_values(cursor,
                 """
                 INSERT INTO wallet_status (wallet_id, status, assets_found, total_value, error_message)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (wallet_id, status_info['status'], status_info['assets_found'],
-                  status_info['total_value'], status_info['error']))
+                VALUES %s
+            """, [(wallet_id, status_info['status'], status_info['assets_found'],
+                   status_info['total_value'], status_info['error'])
+                  for wallet_id, status_info in wallet_status.items()])
 
         conn.commit()
 
@@ -1848,6 +1938,8 @@ async def update_portfolio_data_new():
 
 
 # API endpoints
+# Endpoints that only do blocking psycopg2 work are plain `def`: FastAPI runs
+# them in its threadpool so database round trips don't stall the event loop.
 
 @app.get("/")
 async def root():
@@ -1866,7 +1958,7 @@ async def root():
 
 
 @app.get("/health")
-async def health_check():
+def health_check():
     """Health check endpoint"""
     try:
         conn = get_db_connection()
@@ -1938,22 +2030,28 @@ async def health_check():
 
 
 @app.post("/api/wallets", response_model=WalletResponse)
-async def create_wallet(wallet: WalletCreate):
+def create_wallet(wallet: WalletCreate):
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
+        # ON CONFLICT skips duplicates in the same statement instead of raising
+        # and rolling back; no returned row means the address already exists
         cursor.execute(
-            "INSERT INTO wallets (address, label, network) VALUES (%s, %s, %s) RETURNING id",
-            (wallet.address, wallet.label, wallet.network))
+            """
+            INSERT INTO wallets (address, label, network) VALUES (%s, %s, %s)
+            ON CONFLICT (address) DO NOTHING
+            RETURNING id
+        """, (wallet.address, wallet.label, wallet.network))
         result = cursor.fetchone()
-        wallet_id = result['id'] if result else None
+        if result is None:
+            raise HTTPException(status_code=400, detail="Wallet address already exists")
         conn.commit()
 
-        return WalletResponse(id=wallet_id, address=wallet.address, label=wallet.label, network=wallet.network)
-    except psycopg2.IntegrityError:
+        return WalletResponse(id=result['id'], address=wallet.address, label=wallet.label, network=wallet.network)
+    except HTTPException:
         conn.rollback()
-        raise HTTPException(status_code=400, detail="Wallet address already exists")
+        raise
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
@@ -1963,7 +2061,7 @@ async def create_wallet(wallet: WalletCreate):
 
 
 @app.get("/api/wallets", response_model=List[WalletResponse])
-async def get_wallets():
+def get_wallets():
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -1976,7 +2074,7 @@ async def get_wallets():
 
 
 @app.delete("/api/wallets/{wallet_id}")
-async def delete_wallet(wallet_id: int):
+def delete_wallet(wallet_id: int):
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -2005,7 +2103,7 @@ async def update_portfolio(background_tasks: BackgroundTasks):
 
 
 @app.get("/api/portfolio", response_model=PortfolioResponse)
-async def get_portfolio():
+def get_portfolio():
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -2130,7 +2228,7 @@ async def get_portfolio():
 
 
 @app.get("/api/wallets/{wallet_id}/details", response_model=WalletDetailsResponse)
-async def get_wallet_details(wallet_id: int):
+def get_wallet_details(wallet_id: int):
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -2220,7 +2318,7 @@ async def get_wallet_details(wallet_id: int):
 
 
 @app.put("/api/assets/{symbol}/notes")
-async def update_asset_notes(symbol: str, notes: str):
+def update_asset_notes(symbol: str, notes: str):
     """Update notes for a specific asset"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -2244,7 +2342,7 @@ async def update_asset_notes(symbol: str, notes: str):
 
 
 @app.put("/api/assets/{symbol}/purchase_price")
-async def update_asset_purchase_price(symbol: str, request: dict):
+def update_asset_purchase_price(symbol: str, request: dict):
     """Update purchase price for a specific asset"""
     if not symbol or not symbol.strip():
         raise HTTPException(status_code=400, detail="Symbol is required")
@@ -2375,7 +2473,7 @@ async def update_asset_purchase_price(symbol: str, request: dict):
 
 
 @app.post("/api/assets/hide")
-async def hide_asset(token_address: str, symbol: str, name: str):
+def hide_asset(token_address: str, symbol: str, name: str):
     """Hide an asset from portfolio calculations"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -2397,7 +2495,7 @@ async def hide_asset(token_address: str, symbol: str, name: str):
 
 
 @app.delete("/api/assets/hide/{token_address}")
-async def unhide_asset(token_address: str):
+def unhide_asset(token_address: str):
     """Unhide an asset"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -2414,7 +2512,7 @@ async def unhide_asset(token_address: str):
 
 
 @app.get("/api/assets/hidden")
-async def get_hidden_assets():
+def get_hidden_assets():
     """Get list of hidden assets"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -2455,6 +2553,10 @@ async def serve_spa(full_path: str):
     raise HTTPException(status_code=404, detail="Frontend not found")
 
 
+# Liveness probes are answered before FastAPI dispatch; everything else passes through
+asgi_app = HealthCheckInterceptor(app)
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 80))
@@ -2464,7 +2566,7 @@ if __name__ == "__main__":
 
     print(f"🚀 [SERVER] Starting server on port {port}")
 
-    uvicorn.run(app,
+    uvicorn.run(asgi_app,
                 host="0.0.0.0",
                 port=port,
                 log_level="info" if os.environ.get("NODE_ENV") != "production" else "warning",
@@ -0,0 +1,54 @@
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Token metadata rarely changes; prices go stale quickly
+METADATA_TTL = 3600
+PRICE_TTL = 300
+
+
+class TTLCache:
+    """In-process key/value cache whose entries expire after ttl seconds.
+
+    hits and misses are counted so cache effectiveness can be logged.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 10_000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any):
+        if key not in self._entries and len(self._entries) >= self.maxsize:
+            self._evict()
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self.maxsize:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+token_metadata_cache = TTLCache(METADATA_TTL)
+price_cache = TTLCache(PRICE_TTL)
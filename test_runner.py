@@ -7,21 +7,64 @@ This script runs all tests with complete dependency isolation.
 
 import sys
 import os
+import asyncio
 import subprocess
+import importlib.util
 import json
+import tempfile
+import threading
 import time
+import urllib.request
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
 # Set environment before any imports
-os.environ["PYTHONDONTWRITEBYTECODE"] = "1"
 os.environ["NODE_ENV"] = "test"
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 
+# Full suite output goes here; the JSON report keeps only the last lines
+LOG_DIR = Path("logs")
+REPORT_TAIL_LINES = 100
+
+# One JSON line per finished suite, readable (tail -f) while tests run
+REPORT_JSONL = Path("test_report.jsonl")
+
+# Backend shared by the integration and build suites
+BACKEND_PORT = "8000"
+BACKEND_STARTUP_TIMEOUT = 30
+
+class ResultCollector:
+    """Pytest plugin that tallies test outcomes for an in-process run.
+    
+    When split_marker is set, tests carrying that marker are tallied
+    separately so one pytest session can report several suites.
+    """
+    
+    OUTCOMES = {"passed": "passed", "failed": "failed", "error": "failed", "skipped": "skipped"}
+    
+    def __init__(self, split_marker=None):
+        self.split_marker = split_marker
+        self.counts = {}
+
+    def pytest_terminal_summary(self, terminalreporter):
+        for stat, outcome in self.OUTCOMES.items():
+            for report in terminalreporter.stats.get(stat, []):
+                marked = self.split_marker in getattr(report, "keywords", {})
+                self.counts_for(marked)[outcome] += 1
+
+    def counts_for(self, marked=False):
+        """Return outcome counts for marked (or unmarked) tests."""
+        return self.counts.setdefault(marked, {"passed": 0, "failed": 0, "skipped": 0})
+
 class TestRunner:
     """Main test runner class with complete isolation."""
     
-    def __init__(self):
+    def __init__(self, last_failed=False, upgrade_deps=False):
+        self.last_failed = last_failed
+        self.upgrade_deps = upgrade_deps
+        self._backend_url = None
+        self._jsonl_started = False
         self.test_results = {
             "start_time": datetime.now(),
             "backend_tests": {},
@@ -32,25 +75,147 @@ class TestRunner:
             "total_failed": 0,
             "total_skipped": 0
         }
+        # Shared environment for every child process, built once per run
+        self._test_env = {
+            **os.environ,
+            "NODE_ENV": "test",
+            "DATABASE_URL": "sqlite:///:memory:",
+            "ALCHEMY_API_KEY": "test_key_12345"
+        }
+        # --lf relies on the cache provider and autoloaded plugins
+        if not last_failed:
+            self._test_env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "1"
+
+    def _store_output(self, suite, stdout, stderr):
+        """Save full suite output under logs/ and return report fields with only the tail."""
+        LOG_DIR.mkdir(exist_ok=True)
+        stdout_log = LOG_DIR / f"{suite}.stdout"
+        stdout_log.write_text(stdout)
+        fields = {
+            "stdout_tail": "\n".join(stdout.splitlines()[-REPORT_TAIL_LINES:]),
+            "stdout_log": str(stdout_log)
+        }
+        if stderr:
+            stderr_log = LOG_DIR / f"{suite}.stderr"
+            stderr_log.write_text(stderr)
+            fields["stderr_tail"] = "\n".join(stderr.splitlines()[-REPORT_TAIL_LINES:])
+            fields["stderr_log"] = str(stderr_log)
+        return fields
+
+    @contextmanager
+    def _backend_running(self):
+        """Start the backend once and share it across the suites run inside the block."""
+        backend_url = f"http://localhost:{BACKEND_PORT}"
+        proc = subprocess.Popen(
+            [sys.executable, "server/main.py"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env={**self._test_env, "PORT": BACKEND_PORT}
+        )
+        
+        try:
+            if self._wait_for_backend(proc, backend_url):
+                print(f"✅ Shared backend ready at {backend_url}")
+                self._backend_url = backend_url
+                self._test_env["BACKEND_URL"] = backend_url
+            else:
+                print("⚠️ Shared backend not ready, suites will manage their own")
+            yield
+        finally:
+            self._backend_url = None
+            self._test_env.pop("BACKEND_URL", None)
+            os.environ.pop("BACKEND_URL", None)
+            proc.terminate()
+            proc.wait()
+
+    @staticmethod
+    def _wait_for_backend(proc, backend_url):
+        """Poll /healthz until the backend answers, exits, or times out."""
+        deadline = time.monotonic() + BACKEND_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                return False
+            try:
+                with urllib.request.urlopen(f"{backend_url}/healthz", timeout=1) as response:
+                    if response.status == 200:
+                        return True
+            except OSError:
+                pass
+            time.sleep(0.2)
+        return False
+
+    def precompile_sources(self):
+        """Byte-compile tests and server once so every pytest process reuses __pycache__."""
+        result = subprocess.run([
+            sys.executable, "-m", "compileall", "-q",
+            "-j", str(os.cpu_count() or 1),
+            "tests", "server"
+        ], capture_output=True, text=True, env=self._test_env)
+        
+        if result.returncode != 0:
+            # Read-only checkouts fall back to in-memory compilation
+            print("⚠️ Could not precompile sources, continuing without bytecode cache")
+
+    @staticmethod
+    def _forward_output(data):
+        """Echo raw subprocess output bytes without a decode/encode round trip."""
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    async def _run_streamed(self, *args, timeout=None, echo=False):
+        """Run a subprocess without blocking the loop; return (returncode, stdout, stderr) bytes.
+        
+        With echo=True stdout lines are forwarded as they arrive, so suites
+        running concurrently still show live progress.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._test_env
+        )
+        stdout_lines = []
+        
+        async def pump_stdout():
+            async for line in proc.stdout:
+                stdout_lines.append(line)
+                if echo:
+                    self._forward_output(line)
+        
+        try:
+            _, stderr = await asyncio.wait_for(
+                asyncio.gather(pump_stdout(), proc.stderr.read()), timeout)
+            await proc.wait()
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        
+        return proc.returncode, b"".join(stdout_lines), stderr
 
     def install_test_dependencies(self):
         """Install completely isolated test dependencies."""
-        print("📦 Installing isolated test dependencies...")
+        # Nothing to install when the core test packages are already importable
+        required = ["pytest", "pytest_asyncio", "httpx"]
+        if not self.upgrade_deps and all(importlib.util.find_spec(m) for m in required):
+            print("✅ Test dependencies already available")
+            return True
         
-        # First, ensure we're using clean environment
-        env = os.environ.copy()
-        env["PYTHONDONTWRITEBYTECODE"] = "1"
-        env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+        print("📦 Installing isolated test dependencies...")
         
         # Install from our fixed requirements file
         if os.path.exists("tests/requirements-test.txt"):
-            result = subprocess.run([
+            args = [
                 sys.executable, "-m", "pip", "install", 
                 "--break-system-packages",
-                "--no-cache-dir",
-                "--upgrade",
+                "--prefer-binary",
                 "-r", "tests/requirements-test.txt"
-            ], capture_output=True, text=True, env=env)
+            ]
+            if self.upgrade_deps:
+                args.append("--upgrade")
+            result = subprocess.run(args, capture_output=True, text=True,
+               env={**self._test_env, "PIP_DISABLE_PIP_VERSION_CHECK": "1"})
             
             if result.returncode != 0:
                 print("❌ Failed to install test dependencies:")
@@ -74,57 +239,84 @@ class TestRunner:
             print("❌ Cannot proceed without test dependencies")
             return False
         
-        # Set strict environment to prevent conflicts
-        env = os.environ.copy()
-        env.update({
-            "PYTHONDONTWRITEBYTECODE": "1",
-            "NODE_ENV": "test",
-            "DATABASE_URL": "sqlite:///:memory:",
-            "ALCHEMY_API_KEY": "test_key_12345",
-            "PYTEST_DISABLE_PLUGIN_AUTOLOAD": "1"
-        })
+        collector = ResultCollector()
+        exit_code = self._run_pytest(["tests/backend/", "tests/utils/"], collector)
+        success = self._record_pytest_suite("backend_tests", collector.counts_for(), exit_code)
         
-        # Run pytest with maximum isolation
-        result = subprocess.run([
-            sys.executable, "-m", "pytest", 
-            "tests/backend/", 
-            "tests/utils/",
+        if success:
+            print("✅ Backend tests PASSED")
+        else:
+            print("❌ Backend tests FAILED") 
+            
+        return success
+
+    def run_combined_tests(self):
+        """Run backend and integration tests in one pytest session."""
+        print("🐍🔗 Running Backend + Integration Tests...")
+        print("=" * 50)
+        
+        if not self.install_test_dependencies():
+            print("❌ Cannot proceed without test dependencies")
+            return False
+        
+        return self._run_pytest_combined(
+            ["tests/backend/", "tests/utils/", "tests/integration/"], "integration")
+
+    def _run_pytest_combined(self, paths, marker):
+        """Run all paths at once and attribute results to backend or `marker` tests."""
+        collector = ResultCollector(split_marker=marker)
+        exit_code = self._run_pytest(paths, collector)
+        
+        success = True
+        for marked, suite in ((False, "backend_tests"), (True, f"{marker}_tests")):
+            counts = collector.counts_for(marked)
+            # A failing session only fails the suites that own the failures
+            suite_exit = exit_code if counts["failed"] or exit_code not in (0, 1) else 0
+            suite_ok = self._record_pytest_suite(suite, counts, suite_exit)
+            label = suite.replace("_tests", "").capitalize()
+            print(f"{'✅' if suite_ok else '❌'} {label} tests {'PASSED' if suite_ok else 'FAILED'}")
+            success = success and suite_ok
+        
+        return success
+
+    def _run_pytest(self, paths, collector):
+        """Run pytest in-process on paths; the collector plugin records the outcome."""
+        import pytest
+        os.environ.update(self._test_env)
+        args = [
+            *paths,
             "-v", 
             "--tb=short",
             "--disable-warnings",
             "-p", "no:web3",
             "-p", "no:ethereum", 
-            "-p", "no:cacheprovider",
             "--maxfail=5"
-        ], capture_output=True, text=True, env=env)
-        
-        self.test_results["backend_tests"] = {
-            "exit_code": result.returncode,
-            "stdout": result.stdout,
-            "stderr": result.stderr
-        }
-        
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
-        
-        success = result.returncode == 0
-        if success:
-            print("✅ Backend tests PASSED")
+        ]
+        if self.last_failed:
+            args.append("--lf")
         else:
-            print("❌ Backend tests FAILED") 
-            
-        return success
+            args += ["-p", "no:cacheprovider"]
+        return int(pytest.main(args, plugins=[collector]))
+
+    def _record_pytest_suite(self, suite, counts, exit_code):
+        """Store a suite's outcome counts in the report and return whether it passed."""
+        self.test_results[suite] = {"exit_code": exit_code, **counts}
+        self.test_results["total_passed"] += counts["passed"]
+        self.test_results["total_failed"] += counts["failed"]
+        self.test_results["total_skipped"] += counts["skipped"]
+        return exit_code == 0
 
-    def run_frontend_tests(self):
+    async def run_frontend_tests(self):
         """Run frontend tests safely."""
         print("\n⚛️ Running Frontend Tests...")
         print("=" * 50)
         
         # Check if Node.js is available
         try:
-            subprocess.run(["node", "--version"], check=True, capture_output=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+            node_missing = (await self._run_streamed("node", "--version"))[0] != 0
+        except FileNotFoundError:
+            node_missing = True
+        if node_missing:
             print("⚠️ Node.js not found. Skipping frontend tests.")
             self.test_results["frontend_tests"] = {
                 "exit_code": 0,
@@ -133,12 +325,15 @@ class TestRunner:
             }
             return True
         
-        # For now, just test that build works (avoiding pytest conflicts)
+        # For now, just test that build works (avoiding pytest conflicts).
+        # Build into a scratch directory so this can run alongside suites that use dist/.
         try:
-            build_result = subprocess.run(["npm", "run", "build"], 
-                                        capture_output=True, text=True, timeout=60)
+            with tempfile.TemporaryDirectory() as out_dir:
+                returncode, stdout, stderr = await self._run_streamed(
+                    "npm", "run", "build", "--", "--outDir", out_dir, "--emptyOutDir",
+                    timeout=60)
             
-            if build_result.returncode == 0:
+            if returncode == 0:
                 print("✅ Frontend build test PASSED")
                 self.test_results["frontend_tests"] = {
                     "exit_code": 0,
@@ -148,19 +343,19 @@ class TestRunner:
                 return True
             else:
                 print("❌ Frontend build test FAILED")
-                print(build_result.stderr)
+                self._forward_output(stderr)
                 self.test_results["frontend_tests"] = {
-                    "exit_code": build_result.returncode,
-                    "stdout": build_result.stdout,
-                    "stderr": build_result.stderr
+                    "exit_code": returncode,
+                    **self._store_output("frontend", stdout.decode(errors="replace"),
+                                         stderr.decode(errors="replace"))
                 }
                 return False
                 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             print("❌ Frontend build timed out")
             return False
 
-    def run_integration_tests(self):
+    async def run_integration_tests(self):
         """Run integration tests only if backend passes."""
         print("\n🔗 Running Integration Tests...")
         print("=" * 50)
@@ -175,16 +370,8 @@ class TestRunner:
             }
             return True
         
-        # Set test environment
-        env = os.environ.copy()
-        env.update({
-            "NODE_ENV": "test",
-            "DATABASE_URL": "sqlite:///:memory:",
-            "PYTHONDONTWRITEBYTECODE": "1"
-        })
-        
         # Run integration tests with isolation
-        result = subprocess.run([
+        args = [
             sys.executable, "-m", "pytest",
             "tests/integration/",
             "-v",
@@ -192,20 +379,29 @@ class TestRunner:
             "--disable-warnings",
             "-p", "no:web3",
             "-p", "no:ethereum",
-            "-x"  # Stop on first failure
-        ], capture_output=True, text=True, env=env)
+            # Per-test forking contains crashes, so no need to stop early
+            "-n", "auto",
+            # Keep each xdist_group (e.g. tests sharing server ports) on one worker
+            "--dist=loadgroup",
+            "--forked"
+        ]
+        if self.last_failed:
+            args.append("--lf")
+        else:
+            # Plugin autoload is disabled, so load xdist/forked explicitly
+            args += ["-p", "xdist.plugin", "-p", "pytest_forked"]
+        returncode, stdout, stderr = await self._run_streamed(*args, echo=True)
+        stdout, stderr = stdout.decode(errors="replace"), stderr.decode(errors="replace")
         
         self.test_results["integration_tests"] = {
-            "exit_code": result.returncode,
-            "stdout": result.stdout,
-            "stderr": result.stderr
+            "exit_code": returncode,
+            **self._store_output("integration", stdout, stderr)
         }
         
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
+        if stderr:
+            print("STDERR:", stderr)
         
-        success = result.returncode == 0
+        success = returncode == 0
         if success:
             print("✅ Integration tests PASSED")
         else:
@@ -213,7 +409,7 @@ class TestRunner:
             
         return success
 
-    def run_build_tests(self):
+    async def run_build_tests(self):
         """Run build and deployment tests."""
         print("\n🏗️ Running Build Tests...")
         print("=" * 50)
@@ -221,10 +417,9 @@ class TestRunner:
         # Test frontend build
         print("Testing frontend build...")
         try:
-            build_result = subprocess.run(["npm", "run", "build"], 
-                                        capture_output=True, text=True, timeout=60)
+            returncode, _, stderr = await self._run_streamed("npm", "run", "build", timeout=60)
             
-            if build_result.returncode == 0:
+            if returncode == 0:
                 print("✅ Frontend build successful")
                 
                 # Check build artifacts
@@ -236,11 +431,11 @@ class TestRunner:
                     return False
             else:
                 print("❌ Frontend build failed:")
-                print(build_result.stderr)
+                self._forward_output(stderr)
                 self.test_results["build_tests"] = {"exit_code": 1}
                 return False
                 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             print("❌ Frontend build timed out")
             self.test_results["build_tests"] = {"exit_code": 1}
             return False
@@ -249,10 +444,16 @@ class TestRunner:
             self.test_results["build_tests"] = {"exit_code": 0}
             return True
         
+        # A live shared backend already proves the server imports cleanly
+        if self._backend_url:
+            print(f"\n✅ Backend running at {self._backend_url}, syntax check passed")
+            self.test_results["build_tests"] = {"exit_code": 0}
+            return True
+        
         # Test backend startup (syntax check only)
         print("\nTesting backend syntax...")
         try:
-            result = subprocess.run([
+            returncode, _, stderr = await self._run_streamed(
                 sys.executable, "-c", 
                 """
 import sys
@@ -263,20 +464,20 @@ try:
 except Exception as e:
     print(f'❌ Backend syntax error: {e}')
     sys.exit(1)
-"""
-            ], capture_output=True, text=True, timeout=10)
+""",
+                timeout=10)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 print("✅ Backend syntax check passed")
                 self.test_results["build_tests"] = {"exit_code": 0}
                 return True
             else:
                 print("❌ Backend syntax check failed:")
-                print(result.stderr)
+                self._forward_output(stderr)
                 self.test_results["build_tests"] = {"exit_code": 1}
                 return False
                 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             print("❌ Backend syntax check timed out")
             self.test_results["build_tests"] = {"exit_code": 1}
             return False
@@ -316,15 +517,47 @@ except Exception as e:
         self.test_results["duration"] = str(self.test_results["end_time"] - self.test_results["start_time"])
         
         try:
-            with open("test_report.json", "w") as f:
-                json.dump(self.test_results, f, indent=2, default=str)
+            data = self._serialize_report()
+            # Write in the background so the summary returns immediately;
+            # the non-daemon thread still finishes before interpreter exit.
+            self._report_writer = threading.Thread(
+                target=self._write_report, args=("test_report.json", data))
+            self._report_writer.start()
             print(f"📄 Detailed report saved to: test_report.json")
         except Exception as e:
             print(f"⚠️ Could not save detailed report: {e}")
         
         return all_passed
 
-    def run_all_tests(self):
+    def stream_suite_results(self, *suites):
+        """Append finished suites to the JSONL report, truncating it on the first write."""
+        mode = "a" if self._jsonl_started else "w"
+        self._jsonl_started = True
+        try:
+            with REPORT_JSONL.open(mode) as f:
+                for suite in suites:
+                    f.write(json.dumps({"suite": suite, **self.test_results[suite]}, default=str) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not append to {REPORT_JSONL}: {e}")
+
+    def _serialize_report(self):
+        """Serialize test results to indented JSON bytes."""
+        try:
+            import orjson
+        except ImportError:
+            return json.dumps(self.test_results, indent=2, default=str).encode()
+        return orjson.dumps(self.test_results, default=str, option=orjson.OPT_INDENT_2)
+
+    @staticmethod
+    def _write_report(path, data):
+        """Write serialized report bytes to disk."""
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+        except OSError as e:
+            print(f"⚠️ Could not save detailed report: {e}")
+
+    async def run_all_tests(self):
         """Run all test suites with proper isolation."""
         print("🚀 Starting Comprehensive Test Suite")
         print("=" * 50)
@@ -333,28 +566,35 @@ except Exception as e:
         os.environ["NODE_ENV"] = "test"
         os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
         os.environ.setdefault("ALCHEMY_API_KEY", "test_key")
-        os.environ["PYTHONDONTWRITEBYTECODE"] = "1"
         
         success = True
         
         try:
-            # Backend tests
-            if not self.run_backend_tests():
-                print("⚠️ Backend tests failed, but continuing...")
-                success = False
-            
-            # Frontend tests
-            if not self.run_frontend_tests():
-                print("⚠️ Frontend tests failed, but continuing...")
-                success = False
-            
-            # Integration tests
-            if not self.run_integration_tests():
-                success = False
-            
-            # Build tests
-            if not self.run_build_tests():
-                success = False
+            # Integration and build tests share one backend process
+            with self._backend_running():
+                # Backend and integration tests in a single pytest session,
+                # concurrently with the frontend build. pytest runs in a
+                # worker thread because it drives its own event loops.
+                combined_ok, frontend_ok = await asyncio.gather(
+                    asyncio.to_thread(self.run_combined_tests),
+                    self.run_frontend_tests()
+                )
+                
+                if not combined_ok:
+                    print("⚠️ Backend/integration tests failed, but continuing...")
+                    success = False
+                self.stream_suite_results("backend_tests", "integration_tests")
+                
+                # Frontend tests
+                if not frontend_ok:
+                    print("⚠️ Frontend tests failed, but continuing...")
+                    success = False
+                self.stream_suite_results("frontend_tests")
+                
+                # Build tests (sequential: they rebuild dist/)
+                if not await self.run_build_tests():
+                    success = False
+                self.stream_suite_results("build_tests")
             
         except KeyboardInterrupt:
             print("\n⚠️ Tests interrupted by user")
@@ -366,7 +606,7 @@ except Exception as e:
         # Generate report
         return self.generate_report()
 
-def main():
+async def main():
     """Main entry point."""
     if len(sys.argv) > 1 and sys.argv[1] == "--help":
         print("Crypto Fund Test Runner")
@@ -376,32 +616,41 @@ def main():
         print("  --frontend   Run only frontend tests")
         print("  --integration Run only integration tests")
         print("  --build      Run only build tests")
+        print("  --lf         Re-run only the tests that failed last time")
+        print("  --upgrade-deps Upgrade test dependencies before running")
         print("  --help       Show this help message")
         return
     
-    runner = TestRunner()
+    args = sys.argv[1:]
+    last_failed = "--lf" in args
+    upgrade_deps = "--upgrade-deps" in args
+    args = [arg for arg in args if arg not in ("--lf", "--upgrade-deps")]
+    
+    runner = TestRunner(last_failed=last_failed, upgrade_deps=upgrade_deps)
+    runner.precompile_sources()
     
     # Check for specific test type
-    if len(sys.argv) > 1:
-        test_type = sys.argv[1]
+    if args:
+        test_type = args[0]
         if test_type == "--backend":
-            success = runner.run_backend_tests()
+            success = await asyncio.to_thread(runner.run_backend_tests)
         elif test_type == "--frontend":
-            success = runner.run_frontend_tests()
+            success = await runner.run_frontend_tests()
         elif test_type == "--integration":
-            success = runner.run_integration_tests()
+            success = await runner.run_integration_tests()
         elif test_type == "--build":
-            success = runner.run_build_tests()
+            success = await runner.run_build_tests()
         else:
             print(f"Unknown option: {test_type}")
             return 1
         
+        runner.stream_suite_results(f"{test_type[2:]}_tests")
         return 0 if success else 1
     
     # Run all tests
-    success = runner.run_all_tests()
+    success = await runner.run_all_tests()
     return 0 if success else 1
 
 if __name__ == "__main__":
-    exit_code = main()
+    exit_code = asyncio.run(main())
     sys.exit(exit_code)
@@ -1,6 +1,18 @@
 import pytest
-from unittest.mock import patch, Mock
+import asyncio
+from unittest.mock import patch, AsyncMock, Mock
+import httpx
+import importlib.util
 import json
+import orjson
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "server"))
+from address_validation import ETH_ADDRESS_RE, SOLANA_ADDRESS_RE
+import http_client
+import ttl_cache
 
 # Test asset fetching logic without importing web3 or blockchain libraries
 
@@ -31,6 +43,127 @@ class TestAssetFetching:
 
         assert total_value > 60000  # Reasonable value check
 
+class TestSharedHttpClient:
+    """Test the AsyncClient shared by the fetchers."""
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused_until_closed(self):
+        """Test that fetchers get one pooled client until it is closed."""
+        client = http_client.get_http_client()
+        try:
+            assert http_client.get_http_client() is client
+        finally:
+            await http_client.close_http_client()
+
+        assert client.is_closed
+        replacement = http_client.get_http_client()
+        assert replacement is not client
+        await http_client.close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_client_accepts_brotli_responses(self):
+        """Test that the shared client advertises brotli when it can decode it."""
+        pytest.importorskip("brotli")
+        client = http_client.get_http_client()
+        try:
+            assert "br" in client.headers["accept-encoding"]
+        finally:
+            await http_client.close_http_client()
+
+    def test_client_uses_http2_when_h2_installed(self, monkeypatch):
+        """Test that HTTP/2 is requested exactly when the h2 package is available."""
+        async_client = Mock()
+        monkeypatch.setattr(http_client.httpx, "AsyncClient", async_client)
+        monkeypatch.setattr(http_client, "_client", None)
+
+        assert http_client.get_http_client() is async_client.return_value
+        assert async_client.call_args.kwargs["http2"] == (importlib.util.find_spec("h2") is not None)
+
+class TestRpcBatching:
+    """Test JSON-RPC batching of Alchemy calls."""
+
+    @pytest.mark.asyncio
+    async def test_batch_results_follow_call_order(self):
+        """Test that batched calls are chunked and results map back by id."""
+        payloads = []
+
+        async def post(url, json):
+            payloads.append(json)
+            # Reply out of order, with an error for every third call
+            replies = [{"id": call["id"], "jsonrpc": "2.0", "result": call["params"][0]}
+                       if call["params"][0] % 3 else
+                       {"id": call["id"], "jsonrpc": "2.0", "error": {"code": -32000}}
+                       for call in reversed(json)]
+            return Mock(status_code=200, content=orjson.dumps(replies))
+
+        client = Mock(post=post)
+        calls = [("alchemy_getTokenMetadata", [i]) for i in range(45)]
+
+        results = await http_client.post_rpc_batch(client, "https://rpc.example", calls)
+
+        assert [len(payload) for payload in payloads] == [20, 20, 5]
+        assert results == [i if i % 3 else None for i in range(45)]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_batches_share_one_post(self):
+        """Test that concurrent requests for the same wallet balances hit upstream once."""
+        reply = orjson.dumps([{"id": 0, "jsonrpc": "2.0", "result": "0xde0b6b3a7640000"}])
+
+        async def post(url, json):
+            await asyncio.sleep(0.01)
+            return Mock(status_code=200, content=reply)
+
+        client = Mock()
+        client.post = AsyncMock(side_effect=post)
+        calls = [("eth_getBalance", ["0x0f82438E71EF21e07b6A5871Df2a481B2Dd92A98", "latest"])]
+
+        results = await asyncio.gather(*(http_client.post_rpc_batch(client, "https://rpc.example", calls)
+                                         for _ in range(50)))
+
+        assert client.post.await_count == 1
+        assert results == [["0xde0b6b3a7640000"]] * 50
+
+    @pytest.mark.asyncio
+    async def test_gather_limited_caps_requests_in_flight(self):
+        """Test that at most the limit of requests are awaited at once."""
+        in_flight = 0
+        peak = 0
+
+        async def fetch(i):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return i
+
+        results = await http_client.gather_limited((fetch(i) for i in range(200)), limit=5)
+
+        assert results == list(range(200))
+        assert peak == 5
+
+class TestJsonParsing:
+    """Test decoding of upstream response bodies."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("nft_count, offloaded", [(10, False), (5_000, True)])
+    async def test_large_payloads_parse_off_the_event_loop(self, monkeypatch, nft_count, offloaded):
+        """Test that only bodies over the threshold are parsed in a worker thread."""
+        thread_calls = []
+
+        async def to_thread(func, *args):
+            thread_calls.append(func)
+            return func(*args)
+
+        monkeypatch.setattr(http_client.asyncio, "to_thread", to_thread)
+        payload = {"ownedNfts": [{"tokenId": hex(i), "contract": {"address": "0x" + "ab" * 20}}
+                                 for i in range(nft_count)]}
+        raw = orjson.dumps(payload)
+
+        assert await http_client.parse_json(raw) == payload
+        assert (len(raw) > http_client.JSON_OFFLOAD_THRESHOLD) == offloaded
+        assert thread_calls == ([orjson.loads] if offloaded else [])
+
 class TestAddressValidation:
     """Test address validation logic."""
 
@@ -38,8 +171,7 @@ class TestAddressValidation:
         """Test Ethereum address validation."""
         # Valid Ethereum addresses
         valid_eth = "0x0f82438E71EF21e07b6A5871Df2a481B2Dd92A98"
-        assert valid_eth.startswith("0x")
-        assert len(valid_eth) == 42
+        assert ETH_ADDRESS_RE.fullmatch(valid_eth)
 
         # Invalid addresses
         invalid_addresses = [
@@ -49,16 +181,15 @@ class TestAddressValidation:
         ]
 
         for addr in invalid_addresses:
-            assert not (addr.startswith("0x") and len(addr) == 42 and addr[2:].replace('0', '').replace('1', '').replace('2', '').replace('3', '').replace('4', '').replace('5', '').replace('6', '').replace('7', '').replace('8', '').replace('9', '').replace('a', '').replace('b', '').replace('c', '').replace('d', '').replace('e', '').replace('f', '') == '')
+            assert not ETH_ADDRESS_RE.fullmatch(addr)
 
     def test_solana_address_format(self):
         """Test Solana address validation."""
         valid_sol = "4ZE7D7ecU7tSvA5iJVCVp6MprguDqy7tvXguE64T9Twb"
 
-        # Basic format checks
-        assert len(valid_sol) >= 32
-        assert len(valid_sol) <= 44
-        assert valid_sol.replace('1', '').replace('2', '').replace('3', '').replace('4', '').replace('5', '').replace('6', '').replace('7', '').replace('8', '').replace('9', '') != valid_sol
+        assert SOLANA_ADDRESS_RE.fullmatch(valid_sol)
+        assert not SOLANA_ADDRESS_RE.fullmatch(valid_sol[:31])  # Too short
+        assert not SOLANA_ADDRESS_RE.fullmatch("0" + valid_sol[1:])  # 0 is not base58
 
 class TestDataTransformation:
     """Test data transformation logic."""
@@ -101,20 +232,39 @@ class TestDataTransformation:
 class TestErrorHandling:
     """Test error handling in asset fetching."""
 
-    def test_network_timeout_simulation(self):
-        """Test network timeout handling."""
-        # Simulate timeout scenario
-        timeout_occurred = True
-        max_retries = 3
-        current_retry = 0
+    @pytest.mark.asyncio
+    async def test_timeouts_retried_with_backoff(self, monkeypatch):
+        """Test that timeouts are retried with jittered exponential backoff."""
+        delays = []
+
+        async def sleep(delay):
+            delays.append(delay)
+
+        monkeypatch.setattr(http_client.asyncio, "sleep", sleep)
+        client = Mock()
+        client.post = AsyncMock(side_effect=[httpx.TimeoutException("timed out"),
+                                             httpx.TimeoutException("timed out"),
+                                             Mock(status_code=200)])
+
+        response = await http_client.post_with_retry(client, "https://rpc.example", json={})
+
+        assert response.status_code == 200
+        assert client.post.await_count == 3
+        assert len(delays) == 2
+        for attempt, delay in enumerate(delays):
+            assert 0 <= delay <= http_client.RETRY_BASE_DELAY * 2**attempt
+
+    @pytest.mark.asyncio
+    async def test_retries_stop_after_max_attempts(self, monkeypatch):
+        """Test that a persistent 429 is returned once attempts run out."""
+        monkeypatch.setattr(http_client.asyncio, "sleep", AsyncMock())
+        client = Mock()
+        client.post = AsyncMock(return_value=Mock(status_code=429))
 
-        while timeout_occurred and current_retry < max_retries:
-            current_retry += 1
-            # In real implementation, this would be an API call
-            timeout_occurred = current_retry < 2  # Simulate success on retry 2
+        response = await http_client.post_with_retry(client, "https://rpc.example", json={})
 
-        assert current_retry <= max_retries
-        assert not timeout_occurred  # Should eventually succeed
+        assert response.status_code == 429
+        assert client.post.await_count == http_client.RETRY_ATTEMPTS
 
     def test_invalid_response_handling(self):
         """Test handling of invalid API responses."""
@@ -137,27 +287,73 @@ class TestErrorHandling:
                 # Should use fallback or retry logic
                 assert True  # Placeholder for error handling logic
 
-class TestCaching:
-    """Test caching functionality."""
-
-    def test_price_cache_logic(self):
-        """Test price caching to reduce API calls."""
-        # Simulate cache with expiry
-        import time
-
-        cache = {
-            "ethereum": {
-                "price": 3717.32,
-                "timestamp": time.time(),
-                "expires_in": 300  # 5 minutes
-            }
-        }
-
-        # Test cache hit
-        current_time = time.time()
-        eth_cache = cache.get("ethereum")
-
-        if eth_cache:
-            is_expired = (current_time - eth_cache["timestamp"]) > eth_cache["expires_in"]
-            assert not is_expired  # Should not be expired immediately
-            assert eth_cache["price"] > 0
\ No newline at end of file
+class TestPriceCaching:
+    """Test the TTL cache in front of price and metadata fetches."""
+
+    def test_cache_hit_and_miss_counts(self):
+        """Test that repeat lookups are served from the cache."""
+        cache = ttl_cache.TTLCache(ttl_cache.PRICE_TTL)
+
+        assert cache.get("price:ETH:0x0000000000000000000000000000000000000000") is None
+        cache.set("price:ETH:0x0000000000000000000000000000000000000000", 3717.32)
+
+        assert cache.get("price:ETH:0x0000000000000000000000000000000000000000") == 3717.32
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        """Test that prices are refetched once the TTL has passed."""
+        now = time.monotonic()
+        monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now)
+        cache = ttl_cache.TTLCache(ttl_cache.PRICE_TTL)
+        cache.set("price:SOL:solana", 202.84)
+
+        now += ttl_cache.PRICE_TTL - 1
+        assert cache.get("price:SOL:solana") == 202.84
+
+        now += 1
+        assert cache.get("price:SOL:solana") is None
+
+    @pytest.mark.asyncio
+    async def test_fallback_prices_are_refetched(self, monkeypatch):
+        """Test that placeholder prices from a failed upstream call are not cached."""
+        main = pytest.importorskip("main")
+        eth, wbtc = "0x0000000000000000000000000000000000000000", "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599"
+        quotes = {"ethereum": {"usd": 3717.32}, "wrapped-bitcoin": {"usd": 118870}}
+        upstream_up = False
+
+        async def get(url, params, timeout=None):
+            if not upstream_up:
+                return Mock(status_code=503)
+            return Mock(status_code=200,
+                        content=orjson.dumps({i: quotes[i] for i in params["ids"].split(",")}))
+
+        client = Mock()
+        client.get = AsyncMock(side_effect=get)
+        monkeypatch.setattr(main, "get_http_client", lambda: client)
+        ttl_cache.price_cache.clear()
+        try:
+            prices = await main.get_network_prices("ETH", [eth, wbtc])
+            assert (prices[eth], prices[wbtc]) == (3500.0, 100000)
+
+            upstream_up = True
+            calls = client.get.await_count
+            prices = await main.get_network_prices("ETH", [eth, wbtc])
+            assert client.get.await_count > calls
+            assert (prices[eth], prices[wbtc]) == (3717.32, 118870)
+
+            # Real quotes are cached
+            calls = client.get.await_count
+            await main.get_network_prices("ETH", [eth, wbtc])
+            assert client.get.await_count == calls
+        finally:
+            ttl_cache.price_cache.clear()
+
+    def test_oldest_entry_evicted_when_full(self):
+        """Test that the cache stays bounded at maxsize."""
+        cache = ttl_cache.TTLCache(ttl_cache.METADATA_TTL, maxsize=2)
+        cache.set("meta:eth:a", {"symbol": "A"})
+        cache.set("meta:eth:b", {"symbol": "B"})
+        cache.set("meta:eth:c", {"symbol": "C"})
+
+        assert cache.get("meta:eth:a") is None
+        assert cache.get("meta:eth:c") == {"symbol": "C"}
@@ -2,6 +2,7 @@
 """
 Minimal test to verify testing infrastructure works
 """
+import os
 import pytest
 import sqlite3
 from unittest.mock import Mock
@@ -14,22 +15,25 @@ class TestMinimal:
         assert 1 + 1 == 2
         assert "hello".upper() == "HELLO"
     
-    def test_sqlite_works(self):
+    def test_sqlite_works(self, memdb):
         """Test that sqlite3 works."""
-        conn = sqlite3.connect(":memory:")
-        cursor = conn.cursor()
-        
-        cursor.execute("CREATE TABLE test (id INTEGER, name TEXT)")
-        cursor.execute("INSERT INTO test (id, name) VALUES (?, ?)", (1, "test"))
-        
-        cursor.execute("SELECT * FROM test WHERE id = ?", (1,))
-        result = cursor.fetchone()
-        
-        assert result is not None
-        assert result[0] == 1
-        assert result[1] == "test"
-        
-        conn.close()
+        # Roll the table back afterwards so the shared connection stays empty
+        memdb.execute("SAVEPOINT sqlite_works")
+        try:
+            cursor = memdb.cursor()
+            
+            cursor.execute("CREATE TABLE test (id INTEGER, name TEXT)")
+            cursor.execute("INSERT INTO test (id, name) VALUES (?, ?)", (1, "test"))
+            
+            cursor.execute("SELECT * FROM test WHERE id = ?", (1,))
+            result = cursor.fetchone()
+            
+            assert result is not None
+            assert result[0] == 1
+            assert result[1] == "test"
+        finally:
+            memdb.execute("ROLLBACK TO sqlite_works")
+            memdb.execute("RELEASE sqlite_works")
     
     def test_mocking_works(self):
         """Test that mocking works."""
@@ -42,6 +46,5 @@ class TestMinimal:
     
     def test_environment_variables(self):
         """Test that test environment is set up."""
-        import os
         assert os.environ.get("NODE_ENV") == "test"
         assert "sqlite" in os.environ.get("DATABASE_URL", "")
@@ -2,12 +2,24 @@
 import pytest
 import asyncio
 import os
-import tempfile
+import subprocess
 import json
+import signal
+import time
+import orjson
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from unittest.mock import patch, MagicMock, Mock
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import MagicMock, Mock
 from typing import Dict, List, Any
 
+# uvloop is optional (not available on Windows); fall back to the stdlib loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Import sqlite3 - this is built into Python
 try:
     import sqlite3
@@ -21,93 +33,136 @@ os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["ALCHEMY_API_KEY"] = "test_api_key_12345"
 os.environ["PYTHONDONTWRITEBYTECODE"] = "1"
 
-# Prevent any web3 imports by mocking them at import time
+# Prevent any blockchain library imports by mocking them once at import time;
+# the mocks stay installed for the whole session
 import sys
-sys.modules['web3'] = MagicMock()
-sys.modules['eth_typing'] = MagicMock()
-sys.modules['eth_utils'] = MagicMock()
-sys.modules['eth_account'] = MagicMock()
-
-@pytest.fixture(scope="session", autouse=True)
-def setup_test_environment():
-    """Setup test environment before any tests run."""
-    # Mock all blockchain-related modules
-    blockchain_mocks = {
-        'web3': MagicMock(),
-        'eth_typing': MagicMock(),
-        'eth_utils': MagicMock(),
-        'eth_account': MagicMock(),
-        'solana': MagicMock(),
-        'solders': MagicMock()
-    }
-    
-    for module_name, mock_module in blockchain_mocks.items():
-        sys.modules[module_name] = mock_module
+_BLOCKCHAIN_MOCKS = ("web3", "eth_typing", "eth_utils", "eth_account", "solana", "solders")
+sys.modules.update({module_name: MagicMock() for module_name in _BLOCKCHAIN_MOCKS})
+
+def pytest_configure(config):
+    """Register markers used to attribute results in test_runner.py."""
+    config.addinivalue_line("markers", "integration: marks tests as integration tests")
+
+# Wallets, assets and hidden_assets tables (and asset indexes) used by database tests
+SCHEMA_SQL = """
+    CREATE TABLE wallets (
+        id INTEGER PRIMARY KEY,
+        address TEXT NOT NULL,
+        label TEXT,
+        network TEXT
+    );
     
-    yield
+    CREATE TABLE assets (
+        id INTEGER PRIMARY KEY,
+        wallet_id INTEGER,
+        symbol TEXT,
+        name TEXT,
+        balance REAL,
+        price_usd REAL,
+        FOREIGN KEY (wallet_id) REFERENCES wallets (id)
+    );
+    CREATE INDEX idx_assets_symbol ON assets(symbol);
+    CREATE INDEX idx_assets_wallet ON assets(wallet_id);
     
-    # Cleanup
-    for module_name in blockchain_mocks:
-        if module_name in sys.modules:
-            del sys.modules[module_name]
+    CREATE TABLE hidden_assets (
+        id INTEGER PRIMARY KEY,
+        token_address TEXT NOT NULL UNIQUE,
+        symbol TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
 
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an instance of the default event loop for the test session."""
-    loop = asyncio.new_event_loop()
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     yield loop
     loop.close()
 
-@pytest.fixture
-def mock_database():
-    """Mock database connection for testing."""
-    mock_connection = Mock()
-    mock_cursor = Mock()
-    
-    # Configure cursor methods
-    mock_cursor.fetchall.return_value = []
-    mock_cursor.fetchone.return_value = None
-    mock_cursor.rowcount = 0
-    mock_cursor.description = []
-    mock_cursor.lastrowid = 1
-    
-    # Configure connection methods
-    mock_connection.cursor.return_value = mock_cursor
-    mock_connection.commit.return_value = None
-    mock_connection.rollback.return_value = None
-    mock_connection.close.return_value = None
-    
-    # Context manager support
-    mock_connection.__enter__.return_value = mock_connection
-    mock_connection.__exit__.return_value = None
-    
-    return mock_connection, mock_cursor
+@contextmanager
+def _transaction(conn):
+    """Run the block as one unit of work, rolling it back on error.
+    
+    A savepoint nests inside the db fixture's per-test savepoint; on a
+    connection with no open transaction it acts as BEGIN/COMMIT.
+    """
+    conn.execute("SAVEPOINT tx")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK TO tx")
+        conn.execute("RELEASE tx")
+        raise
+    conn.execute("RELEASE tx")
+
+@pytest.fixture(scope="session")
+def tx():
+    """Context manager that groups a test's writes into a single transaction."""
+    return _transaction
+
+@pytest.fixture(scope="session")
+def http_ok_response():
+    """Successful response shared by every mock HTTP client in the session."""
+    return SimpleNamespace(
+        status_code=200,
+        json=lambda: {"status": "ok"},
+        text='{"status": "ok"}',
+        headers={"content-type": "application/json"},
+        raise_for_status=lambda: None,
+    )
+
+class _StubVerb:
+    """HTTP verb stub that returns return_value when called.
+    
+    Supports the mock.get.return_value = ... idiom the endpoint tests use
+    without Mock's per-access child bookkeeping; use Mock where a test
+    needs call assertions.
+    """
+    __slots__ = ("return_value",)
+    
+    def __init__(self, return_value=None):
+        self.return_value = return_value
+    
+    def __call__(self, *args, **kwargs):
+        return self.return_value
+
+def _stub_http_client():
+    return SimpleNamespace(get=_StubVerb(), post=_StubVerb(), put=_StubVerb(), delete=_StubVerb())
+
+def _reset_http_client(client, response):
+    """Point every HTTP verb on a stub client at the given response."""
+    client.get.return_value = response
+    client.post.return_value = response
+    client.put.return_value = response
+    client.delete.return_value = response
 
 @pytest.fixture
-def mock_http_client():
-    """Create a mock HTTP client for API testing."""
-    client = Mock()
-    
-    # Mock successful responses
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {"status": "ok"}
-    mock_response.text = '{"status": "ok"}'
-    mock_response.headers = {"content-type": "application/json"}
-    mock_response.raise_for_status.return_value = None
-    
-    client.get.return_value = mock_response
-    client.post.return_value = mock_response
-    client.put.return_value = mock_response
-    client.delete.return_value = mock_response
+def mock_http_client(http_ok_response):
+    """Create a stub HTTP client for API testing."""
+    client = _stub_http_client()
+    
+    # Stub successful responses
+    _reset_http_client(client, http_ok_response)
     
     return client
 
+@pytest.fixture(scope="class")
+def shared_http_client():
+    """Stub HTTP client built once for every test in a class."""
+    return _stub_http_client()
+
 @pytest.fixture
+def class_http_client(shared_http_client, http_ok_response):
+    """The class-shared stub HTTP client, reset before each test."""
+    _reset_http_client(shared_http_client, http_ok_response)
+    
+    return shared_http_client
+
+@pytest.fixture(scope="session")
 def sample_portfolio_data():
-    """Sample portfolio data for testing."""
-    return {
+    """Sample portfolio data for testing (shared read-only across the session)."""
+    return MappingProxyType({
         "total_value": 142481.64,
         "assets": [
             {
@@ -132,12 +187,20 @@ def sample_portfolio_data():
         ],
         "wallet_count": 2,
         "performance_24h": 2.5
-    }
+    })
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def sample_portfolio_payload(sample_portfolio_data):
+    """sample_portfolio_data with its JSON body encoded once per session."""
+    return SimpleNamespace(
+        data=sample_portfolio_data,
+        content=json.dumps(dict(sample_portfolio_data)).encode()
+    )
+
+@pytest.fixture(scope="session")
 def sample_wallet_data():
-    """Sample wallet data for testing."""
-    return [
+    """Sample wallet data for testing (shared read-only across the session)."""
+    return tuple(MappingProxyType(wallet) for wallet in [
         {
             "id": 1,
             "address": "0x0f82438E71EF21e07b6A5871Df2a481B2Dd92A98",
@@ -150,12 +213,12 @@ def sample_wallet_data():
             "label": "Solana EOA", 
             "network": "SOL"
         }
-    ]
+    ])
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_api_responses():
-    """Mock external API responses."""
-    return {
+    """Mock external API responses (shared read-only across the session)."""
+    return MappingProxyType({
         "alchemy_eth_balance": {
             "jsonrpc": "2.0",
             "id": 1,
@@ -171,57 +234,60 @@ def mock_api_responses():
             "assets": [],
             "wallet_count": 2
         }
-    }
+    })
 
-@pytest.fixture
-def temp_database():
-    """Create temporary SQLite database for testing."""
-    db_fd, db_path = tempfile.mkstemp()
-    
-    # Create basic table structure
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE wallets (
-            id INTEGER PRIMARY KEY,
-            address TEXT NOT NULL,
-            label TEXT,
-            network TEXT
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE assets (
-            id INTEGER PRIMARY KEY,
-            wallet_id INTEGER,
-            symbol TEXT,
-            name TEXT,
-            balance REAL,
-            price_usd REAL,
-            FOREIGN KEY (wallet_id) REFERENCES wallets (id)
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE hidden_assets (
-            id INTEGER PRIMARY KEY,
-            token_address TEXT NOT NULL UNIQUE,
-            symbol TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+@pytest.fixture(scope="session")
+def memdb():
+    """Bare in-memory SQLite connection (no schema) shared across the session."""
+    conn = sqlite3.connect(":memory:")
+    
+    yield conn
     
-    conn.commit()
     conn.close()
+
+@pytest.fixture(scope="session")
+def temp_database_uri():
+    """Shared-cache URI of the session's in-memory test database.
+    
+    Open extra connections with sqlite3.connect(temp_database_uri, uri=True);
+    request temp_database too so the database and its schema exist.
+    """
+    return f"file:test_{uuid.uuid4().hex}?mode=memory&cache=shared"
+
+@pytest.fixture(scope="session")
+def temp_database(temp_database_uri):
+    """Connection to an in-memory SQLite database shared by the whole session.
+    
+    The database lives as long as this connection is open. Tests that write
+    should use the db fixture so their changes are rolled back.
+    """
+    # sqlite3 keeps compiled statements per connection; size the cache so
+    # every distinct SQL string used by the suite stays prepared all session
+    # Autocommit mode: sqlite3 injects no implicit BEGINs, transactions are
+    # only the explicit savepoints opened by the db and tx fixtures
+    conn = sqlite3.connect(temp_database_uri, uri=True, cached_statements=256, isolation_level=None)
+    # Must be set outside a transaction, so enable it once for every test
+    conn.execute("PRAGMA foreign_keys = ON")
+    # Keep sorter and temp-index spill in RAM like the database itself
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.executescript(SCHEMA_SQL)
+    
+    yield conn
+    
+    conn.close()
+
+@pytest.fixture
+def db(temp_database):
+    """The session connection inside a savepoint that is rolled back after the test."""
+    temp_database.execute("SAVEPOINT test_sp")
     
-    yield db_path
+    yield temp_database
     
-    os.close(db_fd)
-    os.unlink(db_path)
+    temp_database.execute("ROLLBACK TO test_sp")
+    temp_database.execute("RELEASE test_sp")
 
 @pytest.fixture
-def mock_environment():
+def mock_environment(monkeypatch):
     """Mock environment variables for testing."""
     env_vars = {
         "DATABASE_URL": "sqlite:///:memory:",
@@ -230,14 +296,134 @@ def mock_environment():
         "PYTHONDONTWRITEBYTECODE": "1"
     }
     
-    with patch.dict(os.environ, env_vars):
-        yield env_vars
+    for name, value in env_vars.items():
+        monkeypatch.setenv(name, value)
+    return env_vars
 
 @pytest.fixture
-def mock_server_startup():
+def mock_server_startup(monkeypatch):
     """Mock server startup without actually starting it."""
-    with patch('subprocess.run') as mock_run:
-        mock_run.return_value.returncode = 0
-        mock_run.return_value.stdout = "Server started successfully"
-        mock_run.return_value.stderr = ""
-        yield mock_run
+    mock_run = Mock()
+    mock_run.return_value.returncode = 0
+    mock_run.return_value.stdout = "Server started successfully"
+    mock_run.return_value.stderr = ""
+    monkeypatch.setattr(subprocess, "run", mock_run)
+    return mock_run
+
+@pytest.fixture(scope="session")
+def app_jsx_text():
+    """Source of src/App.jsx, read once for every frontend test that inspects it."""
+    with open('src/App.jsx', 'r', encoding='utf-8') as f:
+        return f.read()
+
+@pytest.fixture(scope="session")
+def package_json():
+    """Parsed package.json, shared read-only across the session."""
+    with open('package.json', 'rb') as f:
+        return MappingProxyType(orjson.loads(f.read()))
+
+# Inputs to `vite build`; dist/ is rebuilt only when one is newer than dist/index.html
+_BUILD_INPUTS = ("src", "public", "index.html", "vite.config.js", "package.json",
+                 "tailwind.config.js", "postcss.config.js")
+
+def _newest_mtime(paths):
+    newest = 0.0
+    for path in map(Path, paths):
+        if path.is_dir():
+            newest = max([newest, *(f.stat().st_mtime for f in path.rglob("*") if f.is_file())])
+        elif path.exists():
+            newest = max(newest, path.stat().st_mtime)
+    return newest
+
+@pytest.fixture(scope="session")
+def built_dist():
+    """Frontend build shared by every test that checks dist/.
+    
+    Runs `npm run build` at most once per session, and not at all when
+    dist/index.html is newer than every build input. The returncode and
+    stderr of the build (0 and "" when it was up to date) are exposed so
+    tests can decide whether a failed build is an error or a skip.
+    """
+    index_html = Path("dist/index.html")
+    if index_html.exists() and index_html.stat().st_mtime >= _newest_mtime(_BUILD_INPUTS):
+        return SimpleNamespace(path="dist", returncode=0, stderr="")
+    
+    result = subprocess.run(["npm", "run", "build"], capture_output=True, text=True)
+    return SimpleNamespace(path="dist", returncode=result.returncode, stderr=result.stderr)
+
+def _wait_until_ready(http, url, proc=None, timeout=30):
+    """Poll url every 100ms until it answers, instead of sleeping a fixed time.
+    
+    Gives up early if proc has exited, and quietly on timeout: the
+    integration tests skip themselves when a server is not reachable.
+    """
+    import requests
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            return False
+        try:
+            if http.get(url, timeout=0.5).status_code < 500:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    return False
+
+def _stop_server(proc):
+    """Terminate proc's whole process group; npm otherwise leaves vite running."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    proc.wait()
+
+@pytest.fixture(scope="session")
+def http():
+    """requests.Session shared by the integration tests so calls reuse keep-alive sockets."""
+    # Only the integration tests need requests; keep it out of collection
+    import requests
+    
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    
+    yield session
+    
+    session.close()
+
+@pytest.fixture(scope="session")
+def running_servers(http):
+    """Start the frontend and (unless test_runner.py shares one) backend servers once per session."""
+    # Set by test_runner.py when it already runs a shared backend
+    shared_backend_url = os.environ.get("BACKEND_URL")
+    
+    backend_proc = None
+    if not shared_backend_url:
+        # Start backend server
+        backend_proc = subprocess.Popen(
+            ['python3', 'server/main.py'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env={**os.environ, 'PORT': '8000'},
+            start_new_session=True
+        )
+    
+    # Start frontend server
+    frontend_proc = subprocess.Popen(
+        ['npm', 'run', 'dev'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True
+    )
+    
+    # Both start concurrently; wait until each one answers
+    _wait_until_ready(http, f"{shared_backend_url or 'http://localhost:8000'}/health", backend_proc)
+    _wait_until_ready(http, "http://localhost:5000", frontend_proc)
+    
+    yield backend_proc, frontend_proc
+    
+    # Cleanup
+    if backend_proc:
+        _stop_server(backend_proc)
+    _stop_server(frontend_proc)
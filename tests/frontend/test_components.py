@@ -3,7 +3,31 @@ import pytest
 import os
 import subprocess
 import json
+import selectors
 import tempfile
+import time
+
+def _wait_for_output(proc, marker, timeout=10):
+    """Return True once marker appears on proc's stdout, False if it exits or times out first."""
+    fd = proc.stdout.fileno()
+    seen = b''
+    with selectors.DefaultSelector() as selector:
+        selector.register(fd, selectors.EVENT_READ)
+        deadline = time.monotonic() + timeout
+        while proc.poll() is None and time.monotonic() < deadline:
+            if selector.select(0.1):
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    # stdout closed: the process is on its way out, let it finish
+                    try:
+                        proc.wait(max(0, deadline - time.monotonic()))
+                    except subprocess.TimeoutExpired:
+                        pass
+                    break
+                seen += chunk
+                if marker in seen:
+                    return True
+    return False
 
 class TestFrontendBuild:
     """Test frontend build and compilation."""
@@ -13,14 +37,15 @@ class TestFrontendBuild:
         result = subprocess.run(['npm', 'list'], capture_output=True, text=True)
         assert result.returncode == 0 or "ELSPROBLEMS" in result.stderr
 
-    def test_build_process(self):
+    # Same group as test_build_artifacts so one worker builds dist/ once
+    @pytest.mark.xdist_group("build")
+    def test_build_process(self, built_dist):
         """Test frontend build process."""
-        result = subprocess.run(['npm', 'run', 'build'], capture_output=True, text=True)
-        assert result.returncode == 0
+        assert built_dist.returncode == 0, built_dist.stderr
         
         # Check if dist directory exists
-        assert os.path.exists('dist')
-        assert os.path.exists('dist/index.html')
+        assert os.path.exists(built_dist.path)
+        assert os.path.exists(os.path.join(built_dist.path, 'index.html'))
 
     def test_dev_server_start(self):
         """Test if dev server can start (quick test)."""
@@ -28,13 +53,11 @@ class TestFrontendBuild:
         proc = subprocess.Popen(
             ['npm', 'run', 'dev'], 
             stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE,
-            text=True
+            stderr=subprocess.PIPE
         )
         
-        # Wait a few seconds for server to start
-        import time
-        time.sleep(3)
+        # Wait until Vite reports its local URL (or the process dies)
+        _wait_for_output(proc, b'Local:')
         
         # Check if process is still running
         assert proc.poll() is None
@@ -46,44 +69,35 @@ class TestFrontendBuild:
 class TestFrontendAPI:
     """Test frontend API integration."""
     
-    def test_api_configuration(self):
+    def test_api_configuration(self, app_jsx_text):
         """Test API base URL configuration."""
-        # Read the main App.jsx file
-        with open('src/App.jsx', 'r') as f:
-            content = f.read()
-        
         # Check if API_BASE_URL is properly configured
-        assert 'API_BASE_URL' in content
-        assert 'localhost' in content or 'replit.dev' in content
+        assert 'API_BASE_URL' in app_jsx_text
+        assert 'localhost' in app_jsx_text or 'replit.dev' in app_jsx_text
 
-    def test_component_structure(self):
+    def test_component_structure(self, app_jsx_text):
         """Test React component structure."""
-        with open('src/App.jsx', 'r') as f:
-            content = f.read()
-        
         # Check for main components
-        assert 'MetricCard' in content
-        assert 'AssetCard' in content
-        assert 'WalletCard' in content
-        assert 'PortfolioChart' in content
+        assert 'MetricCard' in app_jsx_text
+        assert 'AssetCard' in app_jsx_text
+        assert 'WalletCard' in app_jsx_text
+        assert 'PortfolioChart' in app_jsx_text
 
-    def test_error_handling(self):
+    def test_error_handling(self, app_jsx_text):
         """Test error handling in components."""
-        with open('src/App.jsx', 'r') as f:
-            content = f.read()
-        
         # Check for error handling patterns
-        assert 'try' in content and 'catch' in content
-        assert 'updateError' in content
-        assert 'setUpdateError' in content
+        assert 'try' in app_jsx_text and 'catch' in app_jsx_text
+        assert 'updateError' in app_jsx_text
+        assert 'setUpdateError' in app_jsx_text
 
 class TestFrontendAssets:
     """Test frontend asset management."""
     
     def test_static_assets(self):
         """Test static asset files."""
-        assert os.path.exists('public/favicon.svg')
-        assert os.path.exists('public/manifest.json')
+        public_files = {entry.name for entry in os.scandir('public')}
+        assert 'favicon.svg' in public_files
+        assert 'manifest.json' in public_files
 
     def test_css_compilation(self):
         """Test CSS compilation with Tailwind."""
@@ -95,14 +109,11 @@ class TestFrontendAssets:
         
         assert '@tailwind' in content
 
-    def test_package_dependencies(self):
+    def test_package_dependencies(self, package_json):
         """Test package.json dependencies."""
-        with open('package.json', 'r') as f:
-            package_data = json.load(f)
-        
         # Check for critical dependencies
-        deps = package_data.get('dependencies', {})
-        dev_deps = package_data.get('devDependencies', {})
+        deps = package_json.get('dependencies', {})
+        dev_deps = package_json.get('devDependencies', {})
         
         assert 'react' in dev_deps
         assert 'chart.js' in deps
@@ -1,59 +1,32 @@
 
 import pytest
 import asyncio
-import time
 import requests
 import subprocess
 import os
 import signal
-import shutil
 from unittest.mock import patch
 
+pytestmark = pytest.mark.integration
+
+# Set by test_runner.py when it already runs a shared backend
+SHARED_BACKEND_URL = os.environ.get("BACKEND_URL")
+BACKEND_URL = SHARED_BACKEND_URL or "http://localhost:8000"
+
+@pytest.mark.xdist_group("servers")
 class TestFullStackIntegration:
     """Test full stack integration scenarios."""
     
-    @pytest.fixture(scope="class")
-    def running_servers(self):
-        """Start both frontend and backend servers for integration testing."""
-        # Start backend server
-        backend_proc = subprocess.Popen(
-            ['python3', 'server/main.py'],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env={**os.environ, 'PORT': '8000'}
-        )
-        
-        # Wait for backend to start
-        time.sleep(5)
-        
-        # Start frontend server
-        frontend_proc = subprocess.Popen(
-            ['npm', 'run', 'dev'],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        # Wait for frontend to start
-        time.sleep(5)
-        
-        yield backend_proc, frontend_proc
-        
-        # Cleanup
-        backend_proc.terminate()
-        frontend_proc.terminate()
-        backend_proc.wait()
-        frontend_proc.wait()
-
-    def test_backend_health_check(self, running_servers):
+    def test_backend_health_check(self, running_servers, http):
         """Test backend health endpoint."""
         backend_proc, frontend_proc = running_servers
         
         # Check if backend process is still running
-        if backend_proc.poll() is not None:
+        if backend_proc and backend_proc.poll() is not None:
             pytest.skip("Backend process terminated")
         
         try:
-            response = requests.get('http://localhost:8000/health', timeout=10)
+            response = http.get(f'{BACKEND_URL}/health', timeout=10)
             assert response.status_code == 200
             data = response.json()
             assert 'status' in data
@@ -61,24 +34,24 @@ class TestFullStackIntegration:
         except requests.exceptions.RequestException as e:
             pytest.skip(f"Backend server not accessible: {e}")
 
-    def test_frontend_loading(self, running_servers):
+    def test_frontend_loading(self, running_servers, http):
         """Test frontend loading."""
         backend_proc, frontend_proc = running_servers
         
         try:
-            response = requests.get('http://localhost:5000', timeout=5)
+            response = http.get('http://localhost:5000', timeout=5)
             assert response.status_code == 200
             assert 'html' in response.headers.get('content-type', '').lower()
         except requests.exceptions.RequestException:
             pytest.skip("Frontend server not accessible")
 
-    def test_api_integration(self, running_servers):
+    def test_api_integration(self, running_servers, http):
         """Test API integration between frontend and backend."""
         backend_proc, frontend_proc = running_servers
         
         # Test portfolio endpoint
         try:
-            response = requests.get('http://localhost:8000/api/portfolio', timeout=10)
+            response = http.get(f'{BACKEND_URL}/api/portfolio', timeout=10)
             assert response.status_code == 200
             data = response.json()
             assert 'total_value' in data
@@ -86,7 +59,7 @@ class TestFullStackIntegration:
         except requests.exceptions.RequestException:
             pytest.skip("API endpoint not accessible")
 
-    def test_wallet_management_flow(self, running_servers):
+    def test_wallet_management_flow(self, running_servers, http):
         """Test complete wallet management flow."""
         backend_proc, frontend_proc = running_servers
         
@@ -98,8 +71,8 @@ class TestFullStackIntegration:
         }
         
         try:
-            response = requests.post(
-                'http://localhost:8000/api/wallets',
+            response = http.post(
+                f'{BACKEND_URL}/api/wallets',
                 json=wallet_data,
                 timeout=5
             )
@@ -109,14 +82,14 @@ class TestFullStackIntegration:
                 wallet_id = wallet['id']
                 
                 # Get wallets
-                response = requests.get('http://localhost:8000/api/wallets', timeout=5)
+                response = http.get(f'{BACKEND_URL}/api/wallets', timeout=5)
                 assert response.status_code == 200
                 wallets = response.json()
                 assert any(w['id'] == wallet_id for w in wallets)
                 
                 # Delete wallet
-                response = requests.delete(
-                    f'http://localhost:8000/api/wallets/{wallet_id}',
+                response = http.delete(
+                    f'{BACKEND_URL}/api/wallets/{wallet_id}',
                     timeout=5
                 )
                 assert response.status_code == 200
@@ -140,38 +113,34 @@ class TestDeploymentReadiness:
 
     def test_deployment_configuration(self):
         """Test deployment configuration files."""
-        assert os.path.exists('.replit'), "Missing .replit configuration file"
+        root_files = {entry.name for entry in os.scandir('.')}
+        assert '.replit' in root_files, "Missing .replit configuration file"
         assert os.path.exists('server/requirements.txt'), "Missing Python requirements file"
-        assert os.path.exists('package.json'), "Missing Node.js package configuration"
+        assert 'package.json' in root_files, "Missing Node.js package configuration"
         
         # Verify .replit has deployment configuration
         with open('.replit', 'r') as f:
             replit_config = f.read()
         assert 'run' in replit_config, ".replit missing run configuration"
 
-    def test_build_artifacts(self):
+    # Same group as test_build_process so one worker builds dist/ once
+    @pytest.mark.xdist_group("build")
+    def test_build_artifacts(self, built_dist):
         """Test build artifact generation."""
-        # Clean any existing build artifacts
-        if os.path.exists('dist'):
-            import shutil
-            shutil.rmtree('dist')
-        
-        # Run build
-        result = subprocess.run(['npm', 'run', 'build'], capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            pytest.skip(f"Build failed: {result.stderr}")
+        if built_dist.returncode != 0:
+            pytest.skip(f"Build failed: {built_dist.stderr}")
         
         # Check artifacts exist
-        assert os.path.exists('dist'), "Build did not create dist directory"
-        assert os.path.exists('dist/index.html'), "Build did not create index.html"
+        index_html = os.path.join(built_dist.path, 'index.html')
+        assert os.path.exists(built_dist.path), "Build did not create dist directory"
+        assert os.path.exists(index_html), "Build did not create index.html"
         
-        # Check index.html content
-        with open('dist/index.html', 'r') as f:
-            content = f.read()
+        # Check index.html content (lowercased once, no decode needed)
+        with open(index_html, 'rb') as f:
+            content = f.read().lower()
         
-        assert '<html' in content.lower(), "index.html missing html tag"
-        assert '</html>' in content.lower(), "index.html missing closing html tag"
+        assert b'<html' in content, "index.html missing html tag"
+        assert b'</html>' in content, "index.html missing closing html tag"
 
     def test_production_readiness(self):
         """Test production readiness checks."""
@@ -200,33 +169,16 @@ class TestDeploymentReadiness:
         for file_path in critical_files:
             assert os.path.exists(file_path), f"Critical file missing: {file_path}"
 
-class TestErrorHandling:
-    """Test error handling and edge cases."""
+class TestPendingScenarios:
+    """Error-handling and performance scenarios still to be implemented."""
     
-    def test_invalid_wallet_address(self):
-        """Test handling of invalid wallet addresses."""
-        # This would test the application's response to invalid inputs
-        assert True  # Placeholder
-
-    def test_network_timeout_handling(self):
-        """Test handling of network timeouts."""
-        # This would test timeout scenarios
-        assert True  # Placeholder
-
-    def test_database_connection_failure(self):
-        """Test handling of database connection failures."""
-        # This would test database failure scenarios
-        assert True  # Placeholder
-
-class TestPerformance:
-    """Test performance and load handling."""
-    
-    def test_portfolio_update_performance(self):
-        """Test portfolio update performance."""
-        # This would test update times
-        assert True  # Placeholder
-
-    def test_concurrent_requests(self):
-        """Test handling of concurrent requests."""
-        # This would test concurrent API calls
-        assert True  # Placeholder
+    @pytest.mark.skip(reason="placeholder; not implemented yet")
+    @pytest.mark.parametrize("case", [
+        "invalid_wallet_address",
+        "network_timeout_handling",
+        "database_connection_failure",
+        "portfolio_update_performance",
+        "concurrent_requests",
+    ])
+    def test_placeholder(self, case):
+        """Reserved for the application's handling of this scenario."""
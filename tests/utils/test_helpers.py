@@ -1,10 +1,22 @@
 
 import pytest
 import asyncio
-import json
 import tempfile
 import os
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+import orjson
+
+# uvloop is optional (not available on Windows); fall back to the stdlib loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+def _dumps(obj: Any) -> str:
+    """Encode obj as a JSON string with orjson (same JSON as json.dumps, minus spaces)."""
+    return orjson.dumps(obj).decode()
 
 class TestDataGenerator:
     """Generate test data for various scenarios."""
@@ -12,86 +24,96 @@ class TestDataGenerator:
     @staticmethod
     def generate_wallet_data(count: int = 2) -> List[Dict[str, Any]]:
         """Generate sample wallet data."""
-        wallets = []
-        for i in range(count):
-            wallet = {
+        # 42-character addresses: the prefix is cut short to make room for the index
+        return [
+            {
                 "id": i + 1,
-                "address": f"0x{'1234567890123456789012345678901234567890'[:-len(str(i))]}{i}",
+                "address": _WALLET_ADDRESS_PREFIX[:42 - len(digits)] + digits,
                 "label": f"Test Wallet {i + 1}",
-                "network": "ETH" if i % 2 == 0 else "SOL"
+                "network": _WALLET_NETWORKS[i & 1]
             }
-            wallets.append(wallet)
-        return wallets
+            for i, digits in enumerate(map(str, range(count)))
+        ]
 
     @staticmethod
     def generate_asset_data(count: int = 5) -> List[Dict[str, Any]]:
         """Generate sample asset data."""
-        assets = []
-        sample_assets = [
-            {"symbol": "ETH", "name": "Ethereum", "price": 3717.32},
-            {"symbol": "WBTC", "name": "Wrapped Bitcoin", "price": 118870},
-            {"symbol": "SOL", "name": "Solana", "price": 202.84},
-            {"symbol": "PENDLE", "name": "Pendle", "price": 4.83},
-            {"symbol": "PENGU", "name": "Pudgy Penguins", "price": 0.04073}
-        ]
-        
-        for i in range(min(count, len(sample_assets))):
-            sample = sample_assets[i]
-            balance = 10.0 + i
-            asset = {
-                "id": f"0x{'0' * 39}{i}",
-                "symbol": sample["symbol"],
-                "name": sample["name"],
-                "balance": balance,
-                "balance_formatted": f"{balance:.6f}",
-                "price_usd": sample["price"],
-                "value_usd": balance * sample["price"],
-                "purchase_price": sample["price"] * 0.6,  # 60% of current price
-                "total_invested": balance * sample["price"] * 0.6,
-                "realized_pnl": 0,
-                "unrealized_pnl": balance * sample["price"] * 0.4,
-                "total_return_pct": 66.67,
-                "notes": f"Test notes for {sample['symbol']}",
-                "is_nft": False,
-                "floor_price": 0,
-                "image_url": None,
-                "nft_metadata": None
-            }
-            assets.append(asset)
-        
-        return assets
+        # Fresh dicts per call so callers may mutate them; the values are all immutable
+        return [dict(asset) for asset in _asset_records(min(count, len(_SAMPLE_ASSETS)))]
 
     @staticmethod
     def generate_nft_data(count: int = 2) -> List[Dict[str, Any]]:
         """Generate sample NFT data."""
-        nfts = []
-        for i in range(count):
-            nft = {
-                "id": f"0xnft{'0' * 35}{i}",
-                "symbol": f"NFT{i}",
-                "name": f"Test NFT Collection {i}",
-                "balance": 5 + i,
-                "balance_formatted": f"{5 + i} NFTs",
-                "price_usd": 0,
-                "value_usd": (5 + i) * 0.1,  # Floor price * count
-                "purchase_price": 0,
-                "total_invested": 0,
-                "realized_pnl": 0,
-                "unrealized_pnl": 0,
-                "total_return_pct": 0,
-                "notes": "",
-                "is_nft": True,
-                "floor_price": 0.1,
-                "image_url": f"https://example.com/nft{i}.png",
-                "nft_metadata": json.dumps({
-                    "token_ids": [str(j) for j in range(1, 6 + i)],
-                    "collection": f"Test Collection {i}",
-                    "image_url": f"https://example.com/nft{i}.png"
-                })
-            }
-            nfts.append(nft)
-        
-        return nfts
+        return [dict(nft) for nft in _nft_records(count)]
+
+_WALLET_ADDRESS_PREFIX = "0x" + "1234567890" * 4
+_WALLET_NETWORKS = ("ETH", "SOL")
+
+# (symbol, name, price) of the assets generate_asset_data draws from
+_SAMPLE_ASSETS = (
+    ("ETH", "Ethereum", 3717.32),
+    ("WBTC", "Wrapped Bitcoin", 118870),
+    ("SOL", "Solana", 202.84),
+    ("PENDLE", "Pendle", 4.83),
+    ("PENGU", "Pudgy Penguins", 0.04073),
+)
+
+@lru_cache(maxsize=8)
+def _asset_records(count: int) -> Tuple[Dict[str, Any], ...]:
+    """Derived asset records for the first count sample assets, computed once per count."""
+    assets = []
+    for i, (symbol, name, price) in enumerate(_SAMPLE_ASSETS[:count]):
+        balance = 10.0 + i
+        assets.append({
+            "id": f"0x{'0' * 39}{i}",
+            "symbol": symbol,
+            "name": name,
+            "balance": balance,
+            "balance_formatted": f"{balance:.6f}",
+            "price_usd": price,
+            "value_usd": balance * price,
+            "purchase_price": price * 0.6,  # 60% of current price
+            "total_invested": balance * price * 0.6,
+            "realized_pnl": 0,
+            "unrealized_pnl": balance * price * 0.4,
+            "total_return_pct": 66.67,
+            "notes": f"Test notes for {symbol}",
+            "is_nft": False,
+            "floor_price": 0,
+            "image_url": None,
+            "nft_metadata": None
+        })
+    return tuple(assets)
+
+@lru_cache(maxsize=8)
+def _nft_records(count: int) -> Tuple[Dict[str, Any], ...]:
+    """NFT records (with their encoded nft_metadata) computed once per count."""
+    nfts = []
+    for i in range(count):
+        nfts.append({
+            "id": f"0xnft{'0' * 35}{i}",
+            "symbol": f"NFT{i}",
+            "name": f"Test NFT Collection {i}",
+            "balance": 5 + i,
+            "balance_formatted": f"{5 + i} NFTs",
+            "price_usd": 0,
+            "value_usd": (5 + i) * 0.1,  # Floor price * count
+            "purchase_price": 0,
+            "total_invested": 0,
+            "realized_pnl": 0,
+            "unrealized_pnl": 0,
+            "total_return_pct": 0,
+            "notes": "",
+            "is_nft": True,
+            "floor_price": 0.1,
+            "image_url": f"https://example.com/nft{i}.png",
+            "nft_metadata": _dumps({
+                "token_ids": list(map(str, range(1, 6 + i))),
+                "collection": f"Test Collection {i}",
+                "image_url": f"https://example.com/nft{i}.png"
+            })
+        })
+    return tuple(nfts)
 
 class MockAPIResponses:
     """Mock API responses for testing."""
@@ -108,16 +130,20 @@ class MockAPIResponses:
     @staticmethod
     def alchemy_token_response(tokens: List[Dict[str, str]]) -> Dict[str, Any]:
         """Generate Alchemy token balance response."""
+        return MockAPIResponses.alchemy_token_response_tuples(
+            [(token["address"], token["balance"]) for token in tokens]
+        )
+
+    @staticmethod
+    def alchemy_token_response_tuples(tokens: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """Generate Alchemy token balance response from (address, balance) pairs."""
         return {
             "jsonrpc": "2.0",
             "id": 1,
             "result": {
                 "tokenBalances": [
-                    {
-                        "contractAddress": token["address"],
-                        "tokenBalance": token["balance"]
-                    }
-                    for token in tokens
+                    {"contractAddress": address, "tokenBalance": balance}
+                    for address, balance in tokens
                 ]
             }
         }
@@ -141,6 +167,26 @@ class MockAPIResponses:
             }
         }
 
+    @staticmethod
+    def ethereum_balance_response_bytes(balance_wei: int) -> bytes:
+        """Ethereum balance response encoded once, for use as a mocked response body."""
+        return orjson.dumps(MockAPIResponses.ethereum_balance_response(balance_wei))
+
+    @staticmethod
+    def alchemy_token_response_bytes(tokens: List[Dict[str, str]]) -> bytes:
+        """Alchemy token balance response encoded once, for use as a mocked response body."""
+        return orjson.dumps(MockAPIResponses.alchemy_token_response(tokens))
+
+    @staticmethod
+    def coingecko_price_response_bytes(prices: Dict[str, float]) -> bytes:
+        """CoinGecko price response encoded once, for use as a mocked response body."""
+        return orjson.dumps(MockAPIResponses.coingecko_price_response(prices))
+
+    @staticmethod
+    def solana_balance_response_bytes(balance_lamports: int) -> bytes:
+        """Solana balance response encoded once, for use as a mocked response body."""
+        return orjson.dumps(MockAPIResponses.solana_balance_response(balance_lamports))
+
 class TestEnvironment:
     """Manage test environment setup and teardown."""
     
@@ -168,14 +214,14 @@ class TestEnvironment:
     @staticmethod
     def create_temp_config(config_data: Dict[str, Any]) -> str:
         """Create temporary configuration file."""
+        data = memoryview(orjson.dumps(config_data))
         fd, path = tempfile.mkstemp(suffix='.json')
         try:
-            with os.fdopen(fd, 'w') as tmp_file:
-                json.dump(config_data, tmp_file)
-            return path
-        except:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
             os.close(fd)
-            raise
+        return path
 
 class AsyncTestHelper:
     """Helper for async testing."""
@@ -183,7 +229,7 @@ class AsyncTestHelper:
     @staticmethod
     def run_async_test(coro):
         """Run async test function."""
-        loop = asyncio.new_event_loop()
+        loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
             return loop.run_until_complete(coro)
@@ -191,18 +237,32 @@ class AsyncTestHelper:
             loop.close()
 
     @staticmethod
-    async def wait_for_condition(condition_func, timeout: float = 5.0, interval: float = 0.1):
-        """Wait for a condition to become true."""
-        start_time = asyncio.get_event_loop().time()
+    async def wait_for_event(event: asyncio.Event, timeout: float = 5.0) -> bool:
+        """Wait for event to be set; returns False on timeout."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @staticmethod
+    async def wait_for_condition(condition_func, timeout: float = 5.0, interval: float = 0.05):
+        """Wait for a condition to become true (polling; prefer wait_for_event)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
         while True:
             if condition_func():
                 return True
             
-            if asyncio.get_event_loop().time() - start_time > timeout:
+            if loop.time() > deadline:
                 return False
             
             await asyncio.sleep(interval)
 
+def _is_postgres(db_connection) -> bool:
+    """True for psycopg2 connections (%s placeholders); anything else is treated as sqlite3."""
+    return type(db_connection).__module__.startswith("psycopg2")
+
 class DatabaseTestHelper:
     """Helper for database testing."""
     
@@ -213,11 +273,22 @@ class DatabaseTestHelper:
         
         # Delete all data from test tables
         tables = ['assets', 'hidden_assets', 'asset_notes', 'purchase_history', 'portfolio_history', 'wallets']
-        for table in tables:
-            try:
-                cursor.execute(f"DELETE FROM {table}")
-            except:
-                pass  # Table might not exist
+        if _is_postgres(db_connection):
+            # A failed statement aborts the transaction, so look up which tables exist
+            # first, then empty them all (and reset their ids) in one statement
+            cursor.execute(
+                "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename = ANY(%s)",
+                (tables,)
+            )
+            existing = [row[0] for row in cursor.fetchall()]
+            if existing:
+                cursor.execute(f"TRUNCATE TABLE {', '.join(existing)} RESTART IDENTITY CASCADE")
+        else:
+            for table in tables:
+                try:
+                    cursor.execute(f"DELETE FROM {table}")
+                except:
+                    pass  # Table might not exist
         
         db_connection.commit()
 
@@ -225,11 +296,15 @@ class DatabaseTestHelper:
     def insert_test_wallets(db_connection, wallets: List[Dict[str, Any]]):
         """Insert test wallets into database."""
         cursor = db_connection.cursor()
+        rows = [(wallet["address"], wallet["label"], wallet["network"]) for wallet in wallets]
         
-        for wallet in wallets:
-            cursor.execute(
-                "INSERT INTO wallets (address, label, network) VALUES (%s, %s, %s)",
-                (wallet["address"], wallet["label"], wallet["network"])
-            )
+        if _is_postgres(db_connection):
+            from psycopg2.extras import execute_values
+            
+            # One multi-row INSERT per page instead of a round-trip per wallet
+            execute_values(cursor, "INSERT INTO wallets (address, label, network) VALUES %s", rows,
+                           page_size=500)
+        else:
+            cursor.executemany("INSERT INTO wallets (address, label, network) VALUES (?, ?, ?)", rows)
         
         db_connection.commit()
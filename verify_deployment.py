@@ -49,25 +49,21 @@ def test_database_connection():
         )
         cursor = conn.cursor()
         
-        # Basic connectivity test
-        cursor.execute("SELECT 1 as test")
-        result = cursor.fetchone()
-        
-        # Get database info
-        cursor.execute("SELECT current_database(), current_user, version()")
+        # Connectivity, database info and our tables in one round-trip
+        cursor.execute("""
+            SELECT current_database(), current_user, version(),
+                   (SELECT array_agg(table_name::text ORDER BY table_name)
+                    FROM information_schema.tables
+                    WHERE table_schema = 'public') AS tables
+        """)
         db_info = cursor.fetchone()
         
         print(f"✅ Database: {db_info['current_database']}")
         print(f"✅ User: {db_info['current_user']}")
         print(f"✅ PostgreSQL Version: {db_info['version'].split(',')[0]}")
         
-        # Check if our tables exist
-        cursor.execute("""
-            SELECT table_name FROM information_schema.tables 
-            WHERE table_schema = 'public' 
-            ORDER BY table_name
-        """)
-        tables = [row['table_name'] for row in cursor.fetchall()]
+        # array_agg over no rows is NULL
+        tables = db_info['tables'] or []
         
         print(f"✅ Tables found: {len(tables)}")
         if tables: